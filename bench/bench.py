@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""Benchmarks for the compile, classify and render hot paths.
+
+Usage:
+  bench.py [--corpus=FILE | --synthetic=N] [--lines=LIST] [--repeat=R] [--output=FILE] [--baseline=FILE] [--tolerance=X]
+
+Times each stage separately and prints the results as JSON: tagging,
+cleanup, classification of each category, JSON output, word list loading
+and merging, and rendering at several line counts. The best of --repeat
+runs is kept for each stage. With a baseline from an earlier --output, any
+stage more than --tolerance times slower is reported and the exit status
+is 1.
+
+Timings depend on the machine, so no baseline is kept in the repository.
+Make one on the machine you'll compare on, before changing anything:
+
+  python bench/bench.py --output=bench/baseline.json
+
+and after the change compare with --baseline=bench/baseline.json.
+
+Options:
+  -c FILE --corpus FILE     Text to compile. [default: bench/aesop.txt]
+  -s N --synthetic N        Use a synthetic corpus of N sentences instead.
+  -l LIST --lines LIST      Line counts to render. [default: 1000,100000,1000000]
+  -r R --repeat R           Runs of each stage. [default: 3]
+  -o FILE --output FILE     Also save the results to FILE.
+  -b FILE --baseline FILE   Compare against saved results.
+  -t X --tolerance X        Allowed slowdown against the baseline. [default: 1.25]
+"""
+
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from docopt import docopt
+from chargenlib.binary import write_binary
+from chargenlib.hypernyms import classify
+from chargenlib.pipeline import CATEGORIES, Compiler, cleanup_tagged, select_by_tag
+from chargenlib.sampler import Sampler
+from chargenlib.template import compile_template, render
+from chargenlib.wordlists import load_wordlists
+from corpus import synthetic_lines
+
+TEMPLATE = 'The %jj %jj :person from the :loc , with :item .'
+
+def timed(func, repeat):
+    """Return the result of func and the best wall time of repeat runs."""
+    best = None
+    for xx in range(repeat):
+        start = time.time()
+        result = func()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+def read_lines(arguments):
+    if arguments['--synthetic']:
+        return list(synthetic_lines(int(arguments['--synthetic'])))
+    with open(os.path.join(ROOT, arguments['--corpus'])) as ff:
+        return ff.readlines()
+
+def run(arguments):
+    repeat = int(arguments['--repeat'])
+    results = {}
+    lines = read_lines(arguments)
+
+    counts, results['tag'] = timed(lambda: Compiler().tag(lines), repeat)
+    tagged = counts.keys()
+
+    def cleanup():
+        # Start cold, or every run after the first only measures the index
+        return cleanup_tagged(tagged, Compiler().test)
+    cleaned, results['cleanup'] = timed(cleanup, repeat)
+    nouns = select_by_tag(cleaned, 'NN')
+
+    for key, hypers in sorted(CATEGORIES.items()):
+        def classify_one():
+            return classify(nouns, {key: hypers}, Compiler().test)
+        results['classify.' + key] = timed(classify_one, repeat)[1]
+
+    data = Compiler().parse_tagged(tagged)
+    text, results['json.dump'] = timed(lambda: json.dumps(data), repeat)
+
+    tmp = tempfile.mkdtemp()
+    try:
+        for ext in ('json', 'chgn'):
+            files = [os.path.join(tmp, '%d.%s' % (nn, ext)) for nn in range(2)]
+            for fname in files:
+                if ext == 'json':
+                    with open(fname, 'w') as ff:
+                        ff.write(text)
+                else:
+                    write_binary(data, fname)
+            results['load.' + ext] = timed(lambda: load_wordlists(files[:1]), repeat)[1]
+            results['merge.' + ext] = timed(lambda: load_wordlists(files), repeat)[1]
+    finally:
+        shutil.rmtree(tmp)
+
+    words = load_wordlists([os.path.join(ROOT, 'bench', 'words.json')])
+    slots = compile_template(TEMPLATE.split(' '), words)
+    for count in [int(nn) for nn in arguments['--lines'].split(',')]:
+        def render_lines():
+            sampler = Sampler(words)
+            for xx in range(count):
+                render(slots, ' ', sampler)
+        results['render.%d' % count] = timed(render_lines, repeat)[1]
+        try:
+            from chargenlib.batch import render_batch
+        except ImportError:
+            continue
+        results['render_batch.%d' % count] = timed(
+                lambda: render_batch(slots, ' ', words, count), repeat)[1]
+    return results
+
+def compare(results, baseline, tolerance):
+    """Return (stage, baseline time, new time) for each regression."""
+    slower = []
+    for stage, seconds in sorted(results.items()):
+        before = baseline.get(stage)
+        if before and seconds > before * tolerance:
+            slower.append((stage, before, seconds))
+    return slower
+
+if __name__ == '__main__':
+    arguments = docopt(__doc__)
+    report = {
+            'python': platform.python_version(),
+            'corpus': arguments['--synthetic'] or arguments['--corpus'],
+            'seconds': run(arguments),
+            }
+    print(json.dumps(report, indent=4, sort_keys=True))
+    if arguments['--output']:
+        with open(arguments['--output'], 'w') as ff:
+            json.dump(report, ff, indent=4, sort_keys=True)
+    if arguments['--baseline']:
+        with open(arguments['--baseline']) as ff:
+            baseline = json.load(ff)['seconds']
+        slower = compare(report['seconds'], baseline, float(arguments['--tolerance']))
+        for stage, before, after in slower:
+            sys.stderr.write('%s: %.4fs -> %.4fs\n' % (stage, before, after))
+        if slower:
+            sys.exit(1)
@@ -0,0 +1,30 @@
+# encoding: utf-8
+"""Synthetic corpora for benchmarks.
+
+Sentences are built from fixed word lists with a seeded generator, so the
+same size and seed always give the same text.
+"""
+
+import random
+
+ADJECTIVES = ['old', 'young', 'clever', 'foolish', 'hungry', 'golden', 'quiet',
+        'proud', 'wicked', 'gentle', 'ancient', 'narrow', 'bright', 'weary',
+        'ragged', 'silent', 'bitter', 'noble', 'crooked', 'patient']
+NOUNS = ['fox', 'shepherd', 'merchant', 'castle', 'river', 'festival', 'sword',
+        'bread', 'village', 'battle', 'tower', 'farmer', 'wedding', 'cheese',
+        'bridge', 'priest', 'storm', 'lantern', 'forest', 'soldier', 'harbor',
+        'journey', 'apple', 'temple', 'widow', 'hammer', 'market', 'funeral']
+VERBS = ['found', 'visited', 'feared', 'crossed', 'remembered', 'carried',
+        'praised', 'followed', 'watched', 'built']
+
+def sentence(rng):
+    return 'The %s %s %s the %s %s.' % (rng.choice(ADJECTIVES), rng.choice(NOUNS),
+            rng.choice(VERBS), rng.choice(ADJECTIVES), rng.choice(NOUNS))
+
+def synthetic_lines(sentences, seed=0, per_line=8):
+    """Yield lines of text with the given number of sentences in all."""
+    rng = random.Random(seed)
+    while sentences > 0:
+        count = min(per_line, sentences)
+        yield ' '.join(sentence(rng) for xx in range(count)) + '\n'
+        sentences -= count
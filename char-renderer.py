@@ -2,101 +2,59 @@
 """Character renderer using previously generated files.
 
 Usage:
-    char-renderer <file> <template> [--number=N] [--japanese]
+    char-renderer <file> <template> [--number=N] [--japanese] [--batch] [--seed=S] [--shard=K/N] [--weights=FILE] [--weighting=W] [--temperature=T]
 
 Template keywords begin with a colon and include nn, jj, person, event, location, and item. Following a colon with an exclamation point will capitalize the word.
 
-Additionally, multiple input files can be specified by separating them with commas.
+Additionally, multiple input files can be specified by separating them with commas. Files can be JSON or the binary format written by chargen-compiler --binary.
 
 Japanese input mode removes all half-width spaces from the output. 
 
+With a seed the output is reproducible. Shards split one seeded run across
+processes: run shards 1/N to N/N with the same seed and number, and their
+outputs concatenated in order are the output of the unsharded run. Batch
+and normal modes give different output for the same seed.
+
+Words are picked uniformly unless --weights gives a counts file written by
+chargen-compiler --counts. Then the weighting is one of uniform, frequency
+or inverse (frequency); higher temperatures flatten it.
+
 Options:
     -n N --number N   How many times to render the template [default: 1]
-    -j   --japanese   Japanese mode (see help)
+    -j --japanese     Japanese mode (see help)
+    -b --batch        Draw words for many lines at once with NumPy. Much faster for large N.
+    -s S --seed S     Seed for the random number generators.
+    --shard K/N       Render only the Kth of N parts of the output. [default: 1/1]
+    -w FILE --weights FILE   Word counts for weighted picks.
+    --weighting W     How to weight words by count. [default: frequency]
+    -t T --temperature T     Weighting temperature. [default: 1.0]
 """
 
-import json
-import os
 from docopt import docopt
-from random import random
-from copy import deepcopy
+from chargenlib.pipeline import Renderer
+from chargenlib.weights import load_counts
+from chargenlib.wordlists import load_wordlists
+from chargenlib.streams import parse_shard
 
 # UTF8 magic
 import sys
 reload(sys)
 sys.setdefaultencoding('utf-8')
 
-#For convenience. Feel free to add.
-mappings = {
-        'jj': 'adjectives',
-        'person': 'people',
-        'loc': 'locations',
-        'event': 'events',
-        'item': 'items',
-        'name': 'names'
-        }
-
-def pick(ll):
-    """Pick a random element from a list"""
-    return ll[int(random() * len(ll))]
-
-def dictmerge(dicts):
-    """Merge together a list of dictionaries, keeping all values."""
-    # Each key maps to a list of strings.
-    master = {}
-    for dd in dicts:
-        for key in dd:
-            if not key in master:
-                master[key] = []
-            master[key] = list(set(master[key] + dd[key]))
-    return master
-
-def load_file(fname):
-    input_file = open(fname)
-    data = json.loads(input_file.read())
-    input_file.close()
-    return data
-
-def render(token, data):
-    if token[0:2] == "'s" or token in ',!?:;.':
-        return "%%" + token
-    # Pass through non-special tokens
-    if token[0] not in '%:':
-        return token
-
-    # Can this word re-occur in a single output?
-    unique = True if token[0] == '%' else False
-
-    # Remove prefix 
-    token = token[1:]
-    
-    capital = (token[0] == '!')
-    if capital: token = token[1:]
-
-    # Use a mapping if needed
-    token = mappings[token] if (token in mappings) else token
-
-    result = pick(data[token])
-    if unique: data[token].remove(result)
-    if capital: result = result.capitalize()
-
-    return result
-
-def render_sentence(joiner, template, filler):
-    filler = deepcopy(filler) # Make a copy; we're going to modify it for unique results
-    output = ''
-    for word in template:
-        output += joiner + render(word, filler)
-    output = output.replace(' %%', '')
-    return output
-
 if __name__ == '__main__':
     arguments = docopt(__doc__, version='Character Renderer 0.1')
     files = arguments['<file>'].split(',')
-    words = dictmerge(map(load_file, files))
-    template = arguments['<template>'].split(' ')
-    joiner = '' if arguments['--japanese'] else ' '
-
-    for xx in range(0,int(arguments['--number'])):
-        print(render_sentence(joiner, template, words))
-
+    words = load_wordlists(files)
+    counts = load_counts(arguments['--weights']) if arguments['--weights'] else None
+    try:
+        renderer = Renderer(words, arguments['--japanese'], counts,
+                arguments['--weighting'], float(arguments['--temperature']))
+        renderer.compile(arguments['<template>'])
+        shard, shards = parse_shard(arguments['--shard'])
+    except ValueError as err:
+        sys.exit(str(err))
+    seed = int(arguments['--seed']) if arguments['--seed'] else None
+
+    for lines in renderer.render_blocks(arguments['<template>'], int(arguments['--number']),
+            seed, shard, shards, arguments['--batch']):
+        sys.stdout.write('\n'.join(lines) + '\n')
@@ -1,114 +1,199 @@
 #!/usr/bin/env python
 
-import nltk
-from nltk.corpus import wordnet as wn
-from itertools import groupby
-from math import floor
-from random import random
-import gc
-from collections import Counter
 import json
-from datetime import datetime
+import os
+from chargenlib.instrument import Stats
+from chargenlib.pipeline import Compiler
+from chargenlib.tagging import sentences
 import Tkinter as tk
 from ScrolledText import ScrolledText
 import tkFileDialog as tkf
+import tkMessageBox as tkm
 import ttk
-from threading import Thread
-
-# blacklists are important
-adj_blacklist = ['some','many','quite','very','one','last','first','several','write','next','along']
-
-def has_hypernym(word, hyper):
-    # Can't use lowest common hypernym function here because it's broken
-    # A chef is a person, but their lowest common hypernym is organism (through person).
-    # It's a bug and has been fixed but not yet released.
-    hypers = wn.synsets(hyper)
-    only_nouns = lambda x: x.pos == wn.NOUN
-    syns = filter(only_nouns,wn.synsets(word))
-    if not syns: return False
-    syn = first(syns)
-    while syn != first(syn.root_hypernyms()):
-        syn = syn.hypernyms()
-        if not syn: return False
-        else: syn = first(syn)
-        if syn in hypers:
-            return True
-    return False
-
-# Functional helpers.
-def first(ll): return ll[0]
-def last(ll): return ll[-1]
-def lower(ss): return ss.lower()
-
-def get_tagged_counts(fname):
-    """Return a Counter with the token/tag pairs."""
-    # Putting this in a function helps gc
-    ff = open(fname)
-    doc = ff.read()
-    ff.close()
-    sents = nltk.sent_tokenize(doc)
-    return sum([Counter(nltk.pos_tag(nltk.word_tokenize(sent))) for sent in sents],Counter())
-
-def pick(ll):
-    """Pick a random element from a list"""
-    return ll[int(random() * len(ll))]
-
-def parse_source(filename, hypernyms):
-    tagged = get_tagged_counts(filename).keys()
-    # Do some cleanup
-    tagged = set(map(lambda x: (first(x).lower(), last(x)), tagged))
-    tagged = filter(lambda x: not has_hypernym(first(x), 'number'), tagged)
-    # Necessary if plaintext tables or other garbage are around
-    tagged = filter(lambda x: (not '|' in first(x)) and (not '_' in first(x)), tagged)
-    # Single quotes are often not separated properly by the tagger, so aggressively remove them here
-    tagged = filter(lambda x: "'" != first(x)[0] and "'" != first(x)[-1], tagged)
-
-    # Get the adjectives and nouns
-    adjs = map(first, filter(lambda x: last(x) == 'JJ', tagged))
-    adjs = [x for x in adjs if not x in adj_blacklist]
-    nouns = map(first, filter(lambda x: last(x) == 'NN', tagged))
-
-    # Get the category words
-    data = {'adj': adjs}
-
-    # Hypernyms come in a special format
-    # - newlines divide unrelated entries
-    # - entries on the same line are combined with OR
-
-    hyperstruct = [x.split(',') for x in hypernyms.split("\n")]
-
-    for hp in hyperstruct: 
-        if hp == '': continue
-        name = first(hp)
-        data[name] = []
-        for hh in hp:
-            find_hyper = lambda x: has_hypernym(x, hh)
-            data[name] = list(set(data[name] + filter(find_hyper, nouns)))
-    
+import multiprocessing
+from multiprocessing.queues import SimpleQueue
+
+# Counts parse_source reports progress on, and the share of each file's
+# progress bar they fill
+PHASES = {'sentences tagged': 0.5, 'nouns classified': 0.5}
+# The stage that finishes each count
+PHASE_STAGES = {'tag': 'sentences tagged', 'classify': 'nouns classified'}
+
+def parse_hypernyms(text):
+    """Read word classes from the hypernym box.
+
+    Newlines divide unrelated entries, and entries on the same line are
+    combined with OR. Each class is named after its first hypernym.
+    """
+    categories = {}
+    for line in text.split("\n"):
+        hypers = [hh.strip() for hh in line.split(',') if hh.strip()]
+        if hypers:
+            categories[hypers[0]] = hypers
+    return categories
+
+def parse_source(filename, hypernyms, compiler):
+    with open(filename) as ff:
+        data = compiler.compile(ff, parse_hypernyms(hypernyms))
+    data['adj'] = data.pop('adjectives')
     return data
 
-def parse_sources(filenames, hypernyms, progressbar):
-    data = {}
-    for ff in filenames:
-        newdata = parse_source(ff, hypernyms)
+# The event queue and Compiler of a worker process, set by init_worker.
+# The Compiler is kept for every file the worker analyzes, so its
+# hypernym indexes only grow.
+EVENTS = None
+COMPILER = None
+
+def init_worker(events):
+    global EVENTS, COMPILER
+    EVENTS = events
+    COMPILER = Compiler()
+
+def analyze_file(filename, hypernyms):
+    """Parse one file in a worker, posting progress and the result.
+
+    Events are (filename, event, name, value) tuples.
+    """
+    post = lambda *event: EVENTS.put((filename,) + event)
+    post('start', None, os.getpid())
+    try:
+        # Tagging only counts sentences as it goes, so count them first;
+        # splitting is quick next to tagging
+        with open(filename) as ff:
+            post('total', 'sentences tagged', sum(1 for sent in sentences(ff)))
+        COMPILER.stats = Stats(listener=post, every=100)
+        data = parse_source(filename, hypernyms, COMPILER)
+    except Exception as err:
+        post('error', None, str(err))
+        return
+    post('done', None, data)
+
+class Analysis(object):
+    """Analyzes files in a process pool while the Tk thread stays free.
+
+    Workers post progress and results to a queue that the Tk thread
+    polls, merging each file's word classes as it arrives. A file whose
+    worker dies without posting a result counts as failed. Cancelling
+    kills the workers and throws the partial results away.
+    """
+
+    def __init__(self, filenames, hypernyms):
+        self.pending = set(filenames)
+        # filename -> pid of the worker analyzing it
+        self.running = {}
+        self.data = {}
+        self.cancelled = False
+        # (filename, count name) -> [done, total]
+        self.counts = {}
+        # Puts to a SimpleQueue are written straight to the pipe, so a
+        # worker that dies can't take its last events with it
+        self.events = SimpleQueue()
+        self.pool = multiprocessing.Pool(min(multiprocessing.cpu_count(), len(filenames)),
+                init_worker, (self.events,))
+        self.results = dict((ff, self.pool.apply_async(analyze_file, (ff, hypernyms)))
+                for ff in filenames)
+        self.pool.close()
+
+        self.frame = tk.Frame()
+        self.progress = ttk.Progressbar(self.frame, orient=tk.HORIZONTAL, mode='determinate',
+                maximum=len(filenames))
+        self.progress.pack(side=tk.LEFT)
+        tk.Button(self.frame, text='Cancel', command=self.cancel).pack(side=tk.LEFT)
+        self.frame.pack()
+        self.poll()
+
+    def count(self, filename, name):
+        return self.counts.setdefault((filename, name), [0, None])
+
+    def update_progress(self):
+        """Fill the bar from how far each file's counts have got."""
+        value = 0.0
+        for (filename, name), (done, total) in self.counts.items():
+            if total:
+                value += PHASES[name] * min(done, total) / float(total)
+        self.progress['value'] = value
+
+    def poll(self):
+        if self.cancelled: return
+        # Find dead workers before reading the queue, so anything they
+        # posted before dying is read before their files are failed
+        dead = self.dead_files()
+        while not self.events.empty():
+            filename, event, name, value = self.events.get()
+            if event == 'start':
+                self.running[filename] = value
+            elif event == 'total' and name in PHASES:
+                self.count(filename, name)[1] = value
+            elif event == 'progress' and name in PHASES:
+                self.count(filename, name)[0] = value
+            elif event == 'stage' and name in PHASE_STAGES:
+                # A finished stage is all the way done, even if its total was never sent
+                self.count(filename, PHASE_STAGES[name])[:] = [1, 1]
+            elif event == 'done':
+                self.merge(value)
+                self.settle(filename)
+            elif event == 'error':
+                self.fail(filename, value)
+        for filename in dead:
+            self.fail(filename, 'the worker process stopped unexpectedly')
+        self.check_results()
+        self.update_progress()
+        if self.pending:
+            self.frame.after(100, self.poll)
+        else:
+            self.finish()
+
+    def settle(self, filename):
+        self.pending.discard(filename)
+        self.running.pop(filename, None)
+
+    def fail(self, filename, message):
+        if not filename in self.pending: return
+        self.settle(filename)
+        tkm.showerror('Analysis failed', filename + ': ' + message)
+
+    def dead_files(self):
+        """Files whose worker process has gone."""
+        # active_children() also reaps workers that have exited
+        alive = set(pp.pid for pp in multiprocessing.active_children())
+        return [ff for ff, pid in self.running.items() if not pid in alive]
+
+    def check_results(self):
+        """Fail the files whose task raised outside analyze_file."""
+        for filename, result in self.results.items():
+            if filename in self.pending and result.ready() and not result.successful():
+                try:
+                    result.get()
+                except Exception as err:
+                    self.fail(filename, str(err))
+
+    def merge(self, newdata):
         for key in newdata:
-            if not key in data: data[key] = []
-            data[key] = sorted(list(set(data[key] + newdata[key])))
-    # Ask where to save this
-    output = tkf.asksaveasfile(mode='w',initialfile='chargen-data.json')
-    output.write(json.dumps(data,indent=4,sort_keys=True))
-    output.close()
-    progressbar.destroy()
+            if not key in self.data: self.data[key] = []
+            self.data[key] = sorted(list(set(self.data[key] + newdata[key])))
+
+    def cancel(self):
+        self.cancelled = True
+        self.pool.terminate()
+        self.frame.destroy()
+
+    def finish(self):
+        # Every file has a result or an error, but join() would wait
+        # forever on the task of a worker that died
+        self.pool.terminate()
+        self.frame.destroy()
+        # Ask where to save this
+        output = tkf.asksaveasfile(mode='w',initialfile='chargen-data.json')
+        if not output: return
+        output.write(json.dumps(self.data,indent=4,sort_keys=True))
+        output.close()
 
 def analysis_wrapper(textbox):
     """A wrapper to get the textbox content and start analysis."""
     def doit():
         filenames = tkf.askopenfilenames()
-        progress = ttk.Progressbar(orient=tk.HORIZONTAL, mode='indeterminate')
-        thread = Thread(target=parse_sources,args=(filenames,textbox.get(1.0,tk.END), progress))
-        thread.start()
-        progress.pack()
-        progress.start()
+        if not filenames: return
+        Analysis(filenames, textbox.get(1.0,tk.END))
     return doit
 
 if __name__ == '__main__':
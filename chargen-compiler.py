@@ -1,244 +1,164 @@
 #!/usr/bin/env python
 # encoding: utf-8
+"""Word class compiler.
+
+Usage:
+  chargen-compiler [--cache=FILE] [--cache-size=N] [--jobs=N] [--update=FILE] [--binary=FILE] [--counts=FILE] [--stats] [--profile=FILE] [<file>...]
+  chargen-compiler --batch [--jobs=N] <file>...
+
+Reads text from the files, or stdin if none are given, and prints the word
+classes found in it as JSON. With CHARGEN_JAPANESE set the input should be
+MeCab output.
+
+With --update, the word classes are merged into an existing compiled file
+instead of printed. Files already merged into it are skipped, as are tokens
+already classified; FILE.state keeps track of both. --counts and --binary
+are then written for everything merged so far.
+
+With --batch, each file is compiled on its own to FILE.json, by a pool of
+worker processes (see --jobs) that load the tagger, WordNet and EDICT once
+and keep them for every file they compile. Progress goes to stderr.
+
+Options:
+  --cache FILE            Keep hypernym results in a sqlite file between runs.
+  --cache-size N          Most results to keep in the cache. [default: 1000000]
+  -j N --jobs N           Use N processes. [default: 1]
+  -u FILE --update FILE   Merge into a compiled JSON file.
+  -b --batch              Compile each file separately.
+  --binary FILE           Also write the word classes in binary format.
+  --counts FILE           Also write how often each word occurs, for weighted picks.
+  --stats                 Show progress, then time, memory and cache hits for each stage, on stderr.
+  --profile FILE          Save cProfile output to FILE.
+"""
 
-import nltk
-import re
-from nltk.corpus import wordnet as wn
-from itertools import groupby
-from math import floor
-from random import random
-import gc
-from collections import Counter
 import json
-from datetime import datetime
 import os
+import sys
+import time
+import fileinput
+from multiprocessing import Pool
+from docopt import docopt
+from chargenlib.binary import write_binary
+from chargenlib.incremental import file_fingerprint, load_json, load_state, merge_classes, save_state
+from chargenlib.instrument import Stats, log_progress, profiled
+from chargenlib.pipeline import Compiler, word_counts
+from chargenlib.util import write_atomic
 
 
 #TODO this is terrible, take a command-line option
 JAPANESE = True if 'CHARGEN_JAPANESE' in os.environ else False
 
-def ishiragana(word):
-    return re.search('^[ぁ-ゞ]$', word)
-
-def remove_parens(words):
-    """Remove parentheticals from a string."""
-    # Useful for edict definitions
-    return re.sub(r'\([^)]*\)', '', words)
-
-def strip_all(words):
-    return map(lambda x: x.strip(), words)
-
-def edict_setup(lines):
-    EDICT = {}
-    for line in lines:
-        parts = remove_parens(line).split('/')
-        if '[' in parts[0]:
-            kana = re.sub(r'\].*$', '', re.sub(r'^.*\[', '', parts[0]))
-            keys = parts[0].split('[')[0].split(';')
-        else:
-            keys = parts[0].split(';')
-        keys = strip_all(keys)
-        vals = strip_all(parts[1:-2]) # last one is a code of some kind
-        for key in keys:
-            if not key in EDICT: EDICT[key] = []
-            EDICT[key] += vals
-    return EDICT
-
-if JAPANESE:
-    # simple edict format, one entry per line
-    with open('jp/edict2') as ff:
-        EDICT = edict_setup(ff.read().split("\n"))
-
-    # These are nouns that take "no" and are functionally adjectives
-    # This has most everything that works that way, though "na" is preferred when reasonable
-    # example: 黄金のXX,架空のXX
-    # The list was made using wwwjdic
-    with open('jp/noadj.txt') as ff:
-        NO_ADJ = ff.read().split("\n")
-    #TODO: get list of suru verbs
-
-def edict_trans(word):
-    """Get edict translations of a word"""
-    # very poor as a translator, but good enough for wordnet
-    if word in EDICT:
-        return list(set(EDICT[word]))
-    return []
-
-# blacklists are important
-BLACKLISTS = {
-        # Quantifiers and ordinals aren't interesting
-        'JJ': ["not", "no", "don't", 'some','many','quite','very','one','last','first','several','write','next','along'],
-        # Besides racist terms, Wordnet considers most color words to represent people
-        # These are usually obscure enough to be uninteresting, like "blue" and "gray" for soldiers in the American Civil War
-        # Some of these are just weird, boring, or rarely intended in the sense that means person
-        'NN': ['man', 'woman', 'person','queer', 'faggot', 'oriental', 'gay', 'jew', 'gyp', 'gypsy', 
-            'negro', 'nigger', 'chink', 'nip', 'jap', 'pickaninny', 'black', 'red', 'white', 
-            'yellow', 'pink', 'blue', 'grey', 'gray', 'screw']
-}
-
-def has_hypernym_jp(word, hyper):
-    # optimistic in that *any* translation could work
-    translations = edict_trans(word)
-    for trans in translations:
-        if has_hypernym_en(trans, hyper):
-            return True 
-    return False
-
-def has_hypernym(word, hyper):
+# Set up from the command line; batch workers inherit it
+COMPILER = Compiler(JAPANESE)
+
+def update_compiled(fname, files, jobs=1, counts_file=None, binary=None):
+    """Merge the word classes of any new files into a compiled file.
+
+    Every file is replaced whole, and the state file last, so an
+    interrupted update is redone by the next one.
+    """
+    seen, counts = load_state(fname)
+    data = load_json(fname) if os.path.exists(fname) else {}
+    # stdin can't be fingerprinted, so it's always read
+    new_files = {}
+    for ff in files:
+        if ff != '-':
+            new_files[ff] = file_fingerprint(ff)
+    files = [ff for ff in files if new_files.get(ff) not in seen]
+    if files or not new_files:
+        new_counts = COMPILER.tag(fileinput.input(files), jobs)
+        tagged = [pair for pair in new_counts if not pair in counts]
+        data = merge_classes(data, COMPILER.parse_tagged(tagged))
+        counts.update(new_counts)
+    seen.update(new_files.values())
+
+    with write_atomic(fname) as ff:
+        json.dump(data, ff)
+    if counts_file:
+        with write_atomic(counts_file) as ff:
+            json.dump(word_counts(counts, data), ff)
+    if binary:
+        write_binary(data, binary)
+    save_state(fname, seen, counts)
+
+# Whether this worker has loaded its models
+WARM = False
+
+def warm_up():
+    global WARM
+    if not WARM:
+        COMPILER.warm_up()
+        WARM = True
+
+def compile_file(fname):
+    """Compile one file to FILE.json, as `chargen-compiler FILE` would print.
+
+    Returns the file name, the time taken and the error, if any, so one
+    bad file doesn't end the batch.
+    """
+    start = time.time()
+    try:
+        # Warming up here rather than in the pool initializer means a
+        # missing model fails the file instead of respawning workers forever
+        warm_up()
+        with open(fname) as ff:
+            data = COMPILER.compile(ff)
+        with open(fname + '.json', 'w') as ff:
+            ff.write(json.dumps(data) + '\n')
+    except Exception as err:
+        return fname, time.time() - start, '%s: %s' % (type(err).__name__, err)
+    return fname, time.time() - start, None
+
+def compile_batch(files, jobs=1):
+    """Compile many files in a pool of worker processes that warm up once.
+
+    Returns the number of files that failed.
+    """
     if JAPANESE:
-        return has_hypernym_jp(word, hyper)
-    else:
-        return has_hypernym_en(word, hyper)
-
-def has_hypernym_en(word, hyper):
-    # Can't use lowest common hypernym function here because it's broken
-    # A chef is a person, but their lowest common hypernym is organism (through person).
-    # It's a bug and has been fixed but not yet released.
-    hypers = wn.synsets(hyper)
-    only_nouns = lambda x: x.pos == wn.NOUN
-    syns = filter(only_nouns,wn.synsets(word))
-    if not syns: return False
-    syn = first(syns)
-    while syn != first(syn.root_hypernyms()):
-        syn = syn.hypernyms()
-        if not syn: return False
-        else: syn = first(syn)
-        if syn in hypers:
-            return True
-    return False
-
-# Functional helpers.
-def first(ll): return ll[0]
-def last(ll): return ll[-1]
-def lower(ss): return ss.lower()
-
-def pick(ll):
-    """Pick a random element from a list"""
-    return ll[int(random() * len(ll))]
-
-def pos_tagger(document):
-    """Given a document, return token/POS pairs."""
-    if JAPANESE:
-        return pos_tagger_jp(document)
-    return pos_tagger_en(document)
-
-def pos_tagger_jp(document):
-    """Get POS for Japanese words."""
-    # Assume the document is mecab output
-    pairs = []
-    for line in document.split("\n"):
-        line = line.strip()
-        if line == 'EOS' or line == '': continue 
-        word, _, info = line.partition("\t")
-
-        # Split the info into useful data
-        info = info.split(',')
-        base_pos = info[0] # 名詞, 動詞, 形容詞など
-        if len(info) < 2: print line
-        detail_pos = info[1] # 形容動詞語幹, 一般
-
-        pos = None
-        if base_pos == '名詞':
-            if detail_pos == '一般':
-                pos = 'NN' # normal nouns
-                if word in NO_ADJ: # no-adjectives 黄金
-                    pos = 'JJ'
-                    word = word + 'の'
-            if detail_pos == '形容動詞語幹': # na-adjectives 綺麗
-                pos = 'JJ'
-                word = word + 'な'
-        if base_pos == '形容詞' and detail_pos == '自立': # i-adjectives 新しい
-            # っぽい is an example of a different detail_pos - rare and undesirable
-            pos = 'JJ'
-            word = info[6] # Base form, so 新しい even if 新しくis in the text
-        
-        # reject nouns that are only hiragana; most are bad
-        if pos == 'NN' and ishiragana(word):
-            pos = None
-
-        if pos:
-            pairs += [ (word, pos) ]
-    return pairs
-
-def pos_tagger_en(document):
-    """English POS tagger. Sacrifices accuracy for speed."""
-    sentences = document.split('.')
-    pairs = []
-    for sentence in sentences:
-        words = nltk.word_tokenize(sentence)
-        pairs += nltk.pos_tag(words)
-    return pairs
-
-def get_tagged_counts(text):
-    """Return a Counter with the token/tag pairs."""
-    # Putting this in a function helps gc
-    #sents = nltk.sent_tokenize(text)
-    #XXX we can lose some accuracy and this is much, much faster
-    if JAPANESE: tagged_pairs = pos_tagger_jp(text)
-    else: tagged_pairs = pos_tagger_en(text)
-    return Counter(tagged_pairs)
-
-def cleanup_tagged(tagged):
-    """Remove unnecessary and garbage words from the tagger output."""
-    # First make everything lowercase
-    tagged = set(map(lambda x: (first(x).lower(), last(x)), tagged))
-    # We don't need any numbers
-    tagged = filter(lambda x: not has_hypernym(first(x), 'number'), tagged)
-    # Remove any plaintext tables
-    tagged = filter(lambda x: (not '|' in first(x)) and (not '_' in first(x)), tagged)
-    # Single quotes are often not separated properly by the tagger, so aggressively remove them here
-    tagged = filter(lambda x: "'" != first(x)[0] and "'" != first(x)[-1], tagged)
-    return tagged
-
-def select_by_tag(words, tag):
-    result = map(first, filter(lambda x: last(x) == tag, words))
-    if BLACKLISTS[tag]:
-        result = [r for r in result if not r in BLACKLISTS[tag]]
-    return result
-
-def parse_source(text, hypernyms):
-    # TODO - change smart quotes to plain quotes
-    tagged = get_tagged_counts(text).keys()
-
-    tagged = cleanup_tagged(tagged)
-
-    adjs = select_by_tag(tagged, 'JJ')
-    nouns = select_by_tag(tagged, 'NN')
-
-    data = {'adjectives': sorted(adjs)}
-
-    for key, vals in hypernyms.items():
-        data[key] = []
-        for val in vals:
-            find_hyper = lambda x: has_hypernym(x, val)
-            data[key] = data[key] + filter(find_hyper, nouns)
-        data[key] = sorted(list(set(data[key])))
-
-    # Locations get stupid stuff if you allow body parts
-    if 'locations' in data:
-        for word in data['locations']:
-            if has_hypernym(word, 'body part'):
-                data['locations'].remove(word)
-    
-    return data
-
-#TODO take options, print help
-import fileinput
-source = ''
-hypernyms = {
-    'locations': ['location', 'structure'],
-    'events': ['event'],
-    'items': ['item', 'artifact'],
-    'food': ['food'],
-    'people': ['person'],
-    'trait': ['trait'],
-    'abstraction': ['abstraction']
-    }
-
-for line in fileinput.input():
-    if JAPANESE:
-        source += line # need to keep newlines
-    else:
-        source += line.strip() + ' '
-
-print(json.dumps(parse_source(source, hypernyms)))
+        # Build the EDICT index once here rather than in every worker at once
+        COMPILER.translate('')
+    pool = Pool(jobs)
+    failed = 0
+    try:
+        results = pool.imap_unordered(compile_file, files)
+        for done, (fname, elapsed, error) in enumerate(results, 1):
+            if error:
+                failed += 1
+                sys.stderr.write('[%d/%d] %s failed: %s\n' % (done, len(files), fname, error))
+            else:
+                sys.stderr.write('[%d/%d] %s.json (%.1fs)\n' % (done, len(files), fname, elapsed))
+        pool.close()
+    finally:
+        pool.terminate()
+    return failed
+
+if __name__ == '__main__':
+    arguments = docopt(__doc__, version='Chargen Compiler 0.1')
+    if arguments['--stats']:
+        COMPILER.stats = Stats(enabled=True, listener=log_progress)
+    if arguments['--cache']:
+        COMPILER.open_cache(arguments['--cache'], int(arguments['--cache-size']))
+
+    jobs = int(arguments['--jobs'])
+    with profiled(arguments['--profile']):
+        if arguments['--batch']:
+            failed = compile_batch(arguments['<file>'], jobs)
+        elif arguments['--update']:
+            update_compiled(arguments['--update'], arguments['<file>'], jobs,
+                    arguments['--counts'], arguments['--binary'])
+        else:
+            lines = fileinput.input(arguments['<file>'])
+            counts = COMPILER.tag(lines, jobs)
+            data = COMPILER.parse_tagged(counts.keys())
+            with COMPILER.stats.stage('output'):
+                print(json.dumps(data))
+                if arguments['--counts']:
+                    with open(arguments['--counts'], 'w') as ff:
+                        ff.write(json.dumps(word_counts(counts, data)))
+                if arguments['--binary']:
+                    write_binary(data, arguments['--binary'])
+
+    COMPILER.close()
+    COMPILER.stats.report()
+    if arguments['--batch'] and failed:
+        sys.exit('%d of %d files failed' % (failed, len(arguments['<file>'])))
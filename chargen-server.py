@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""Character renderer as a local HTTP service.
+
+Usage:
+    chargen-server <file> [--host=HOST] [--port=PORT] [--japanese] [--max-count=N] [--weights=FILE] [--weighting=W] [--temperature=T]
+
+Loads the word lists once and renders templates on request. Like
+char-renderer, multiple input files can be separated by commas; they're
+reloaded when they change on disk.
+
+Requests are GETs with query parameters: template (as for char-renderer),
+count (default 1) and seed (optional). The same template, count and seed
+give the same lines as char-renderer --seed. Lines come back as plain text.
+
+Weighted picks work as for char-renderer and apply to every request.
+
+Options:
+    --host HOST            Address to listen on. [default: 127.0.0.1]
+    -p PORT --port PORT    Port to listen on. [default: 8080]
+    -j --japanese          Japanese mode; no spaces between words.
+    --max-count N          Largest count accepted in one request. [default: 10000]
+    -w FILE --weights FILE    Word counts for weighted picks.
+    --weighting W          How to weight words by count. [default: frequency]
+    -t T --temperature T   Weighting temperature. [default: 1.0]
+"""
+
+import sys
+from SocketServer import ThreadingMixIn
+from urlparse import parse_qs
+from wsgiref.simple_server import WSGIServer, make_server
+from docopt import docopt
+from chargenlib.pipeline import Renderer
+from chargenlib.weights import load_counts
+from chargenlib.wordlists import WordLists
+
+# Compiled templates kept by the server
+TEMPLATE_CACHE = 100
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+def respond(start_response, status, body):
+    start_response(status, [('Content-Type', 'text/plain; charset=utf-8'),
+        ('Content-Length', str(len(body)))])
+    return [body]
+
+def make_app(wordlists, japanese, max_count, counts=None, weighting='frequency',
+        temperature=1.0):
+    def app(environ, start_response):
+        query = parse_qs(environ.get('QUERY_STRING', ''))
+        try:
+            template = query.get('template', [''])[0].decode('utf-8')
+        except UnicodeDecodeError:
+            return respond(start_response, '400 Bad Request', 'template must be UTF-8\n')
+        try:
+            count = int(query.get('count', ['1'])[0])
+            seed = int(query['seed'][0]) if 'seed' in query else None
+        except ValueError:
+            return respond(start_response, '400 Bad Request', 'count and seed must be integers\n')
+        if not template or not 0 < count <= max_count:
+            return respond(start_response, '400 Bad Request',
+                    'template and a count from 1 to %d are required\n' % max_count)
+
+        words, derived = wordlists.current()
+        if not 'renderer' in derived:
+            # Templates come from clients, so only a few are kept compiled
+            derived['renderer'] = Renderer(words, japanese, counts, weighting, temperature,
+                    cache_size=TEMPLATE_CACHE)
+        renderer = derived['renderer']
+        try:
+            renderer.compile(template)
+        except ValueError as err:
+            return respond(start_response, '400 Bad Request',
+                    (err.args[0] + '\n').encode('utf-8'))
+
+        lines = list(renderer.render_lines(template, count, seed))
+        return respond(start_response, '200 OK', ('\n'.join(lines) + '\n').encode('utf-8'))
+    return app
+
+if __name__ == '__main__':
+    arguments = docopt(__doc__, version='Chargen Server 0.1')
+    wordlists = WordLists(arguments['<file>'].split(','))
+    counts = load_counts(arguments['--weights']) if arguments['--weights'] else None
+    try:
+        temperature = float(arguments['--temperature'])
+        # Checked here so a bad weighting fails at startup, not per request
+        Renderer({}, counts=counts, weighting=arguments['--weighting'], temperature=temperature)
+    except ValueError as err:
+        sys.exit(str(err))
+    app = make_app(wordlists, arguments['--japanese'], int(arguments['--max-count']),
+            counts, arguments['--weighting'], temperature)
+    server = make_server(arguments['--host'], int(arguments['--port']), app,
+            server_class=ThreadingWSGIServer)
+    server.serve_forever()
@@ -2,7 +2,7 @@
 """Character generator.
 
 Usage:
-  chargen <file> [--count=N] [--adjectives=AN] [--nouns=NN] [--event] [--output=FILE] [--input=FILE]
+  chargen <file> [--count=N] [--adjectives=AN] [--nouns=NN] [--event] [--output=FILE] [--input=FILE] [--jobs=N] [--batch] [--seed=S] [--shard=K/N] [--stats] [--profile=FILE]
 
 Options:
   -c N --count N             How many characters to generate. [default: 100]
@@ -10,57 +10,67 @@ Options:
   -n NN --nouns NN           How many person-nouns to use. [default: 1]
   -e --event                 Generate events instead of characters. [default: False]
   -o FILE --output FILE      Save word classes to JSON file.
-  -i FILE --input FILE       Load word classes from JSON file.
+  -i FILE --input FILE       Load word classes from JSON or binary file.
+  -j N --jobs N              Tag the file with N processes. [default: 1]
+  -b --batch                 Pick words for many lines at once with NumPy.
+  -s S --seed S              Seed for reproducible output.
+  --shard K/N                Generate only the Kth of N parts of the output. [default: 1/1]
+  --stats                    Report time and memory for each stage on stderr.
+  --profile FILE             Save cProfile output to FILE.
+
+With the same seed and count, shards 1/N to N/N concatenated in order give
+the same output as an unsharded run.
 """
 
-import nltk
-from nltk.corpus import wordnet as wn
 from docopt import docopt
-from itertools import groupby
-from math import floor
 from random import random
-import gc
-from collections import Counter
 import json
-from datetime import datetime
-
-def has_hypernym(word, hyper):
-    # Can't use lowest common hypernym function here because it's broken
-    # A chef is a person, but their lowest common hypernym is organism (through person).
-    # It's a bug and has been fixed but not yet released.
-    hypers = wn.synsets(hyper)
-    only_nouns = lambda x: x.pos == wn.NOUN
-    syns = filter(only_nouns,wn.synsets(word))
-    if not syns: return False
-    syn = first(syns)
-    while syn != first(syn.root_hypernyms()):
-        syn = syn.hypernyms()
-        if not syn: return False
-        else: syn = first(syn)
-        if syn in hypers:
-            return True
-    return False
-
-# Functional helpers.
-def first(ll): return ll[0]
-def last(ll): return ll[-1]
-def lower(ss): return ss.lower()
-
-def get_tagged_counts(fname):
-    """Return a Counter with the token/tag pairs."""
-    # Putting this in a function helps gc
-    ff = open(fname)
-    doc = ff.read()
-    ff.close()
-    sents = nltk.sent_tokenize(doc)
-    return sum([Counter(nltk.pos_tag(nltk.word_tokenize(sent))) for sent in sents],Counter())
-
-def pick(ll):
-    """Pick a random element from a list"""
-    return ll[int(random() * len(ll))]
-
-if __name__ == '__main__':
-    arguments = docopt(__doc__, version='Character Generator 0.1')
+from chargenlib.instrument import Stats, profiled
+from chargenlib.pipeline import EXCLUDE, Compiler, pick
+from chargenlib.wordlists import load_file
+from chargenlib.streams import blocks, line_random, parse_shard
+import sys
+
+
+# The word classes, with their hypernyms
+CATEGORIES = {
+    'people': ['person'],
+    'locations': ['location', 'structure'],
+    'events': ['event'],
+    'items': ['food', 'artefact'],
+    }
+
+def character(adjs, people, nadjs, nnouns, random=random):
+    return (' '.join([pick(adjs, random) for x in range(0, nadjs)]) +
+            ' ' + '-'.join([pick(people, random) for x in range(0, nnouns)]))
+
+def event(adjs, events, locs, nadjs, nnouns, random=random):
+    return (' '.join([pick(adjs, random).capitalize() for x in range(0, nadjs)]) +
+            ' ' + '-'.join([pick(events, random).capitalize() for x in range(0, nnouns)]) + ' in the ' +
+            ' '.join([pick(adjs, random).capitalize() for x in range(0, nadjs)]) +
+            ' ' + '-'.join([pick(locs, random).capitalize() for x in range(0, nnouns)]))
+
+def characters_batch(adjs, people, count, nadjs, nnouns, rng):
+    """Generate count characters with vectorized picks."""
+    from chargenlib.batch import pick_batch
+    aa = pick_batch(adjs, (count, nadjs), rng).tolist()
+    pp = pick_batch(people, (count, nnouns), rng).tolist()
+    return [' '.join(a) + ' ' + '-'.join(p) for a, p in zip(aa, pp)]
+
+def events_batch(adjs, events, locs, count, nadjs, nnouns, rng):
+    """Generate count events with vectorized picks."""
+    from chargenlib.batch import pick_batch
+    # Capitalizing the lists once is cheaper than every picked word
+    cap = lambda ll: [x.capitalize() for x in ll]
+    adjs = cap(adjs)
+    aa = pick_batch(adjs, (count, nadjs), rng).tolist()
+    ee = pick_batch(cap(events), (count, nnouns), rng).tolist()
+    bb = pick_batch(adjs, (count, nadjs), rng).tolist()
+    ll = pick_batch(cap(locs), (count, nnouns), rng).tolist()
+    return [' '.join(a) + ' ' + '-'.join(e) + ' in the ' + ' '.join(b) + ' ' + '-'.join(l)
+            for a, e, b, l in zip(aa, ee, bb, ll)]
+
+def main(arguments, stats):
     adjs = []
     names = []
     people = []
@@ -68,48 +78,23 @@ if __name__ == '__main__':
     events = []
     items = []
     if not arguments['--input']:
-        start_time = datetime.now()
-        tagged = get_tagged_counts(arguments['<file>'])
-        tagged_time = datetime.now()
-        print "Tagged, time: " + str(tagged_time - start_time)
-        # As a lazy stop word filter, remove the most common 10% of words.
-        #tagged = tagged.most_common()[int(len(tagged.keys())/10):]
-        tagged = tagged.keys()
-        # Do some cleanup
-        tagged = set(map(lambda x: (first(x).lower(), last(x)), tagged))
-        tagged = filter(lambda x: not has_hypernym(first(x), 'number'), tagged)
-        # Necessary if plaintext tables or other garbage are around
-        tagged = filter(lambda x: (not '|' in first(x)) and (not '_' in first(x)), tagged)
-
-        # Get the adjectives and nouns
-        adjs = map(first, filter(lambda x: last(x) == 'JJ', tagged))
-        nouns = map(first, filter(lambda x: last(x) == 'NN', tagged))
-        names = map(first, filter(lambda x: last(x) == 'NNP', tagged))
-
-        # Get the nouns that describe people
-        is_person = lambda x: has_hypernym(x,'person')
-        people = filter(is_person, nouns)
-
-        # Get nouns that are locations
-        is_place = lambda x: has_hypernym(x,'location') or has_hypernym(x,'structure')
-        locs = filter(is_place, nouns)
-
-        # Get events
-        is_event = lambda x: has_hypernym(x,'event')
-        events = filter(is_event, nouns)
-
-        # Get artifacts/items/food for stores
-        is_item = lambda x: has_hypernym(x,'food') or has_hypernym(x,'artefact') 
-        items = filter(is_item, nouns)
-        hypernymed_time = datetime.now()
-        print "Found hypernyms, time: " + str(hypernymed_time - tagged_time)
+        compiler = Compiler(stats=stats)
+        with open(arguments['<file>']) as ff:
+            # Body parts are kept out of locations, as in the compiler
+            data = compiler.compile(ff, CATEGORIES, int(arguments['--jobs']),
+                    exclude=EXCLUDE, names=True)
+        compiler.close()
+        adjs = data['adjectives']
+        names = data['names']
+        people = data['people']
+        locs = data['locations']
+        events = data['events']
+        items = data['items']
     else:
         # Note this supports multiple files
         files = arguments['--input'].split(',')
         for ff in files:
-            input_file = open(ff)
-            data = json.loads(input_file.read())
-            input_file.close()
+            data = load_file(ff)
 
             adjs += data['adjectives']
             names += data['names']
@@ -132,16 +117,36 @@ if __name__ == '__main__':
         output.close()
 
 
-    if not arguments['--event']:
-        for chars in range(0, int(arguments['--count'])):
-            print (' '.join([pick(adjs) for x in range(0, int(arguments['--adjectives']))]) + 
-                    ' ' + '-'.join([pick(people) for x in range(0, int(arguments['--nouns']))]) )
-
-    else:
-        for chars in range(0, int(arguments['--count'])):
-            print (
-                    ' '.join([pick(adjs).capitalize() for x in range(0, int(arguments['--adjectives']))]) + 
-                    ' ' + '-'.join([pick(events).capitalize() for x in range(0, int(arguments['--nouns']))]) + ' in the ' +
-                    ' '.join([pick(adjs).capitalize() for x in range(0, int(arguments['--adjectives']))]) + 
-                    ' ' + '-'.join([pick(locs).capitalize() for x in range(0, int(arguments['--nouns']))]) )
+    nadjs = int(arguments['--adjectives'])
+    nnouns = int(arguments['--nouns'])
+    seed = int(arguments['--seed']) if arguments['--seed'] else None
+    try:
+        shard, shards = parse_shard(arguments['--shard'])
+    except ValueError as err:
+        sys.exit(str(err))
+
+    with stats.stage('generate'):
+        for size, block_seed in blocks(int(arguments['--count']), seed, shard, shards):
+            if arguments['--batch']:
+                from chargenlib.batch import random_state
+                rng = random_state(block_seed)
+                if not arguments['--event']:
+                    lines = characters_batch(adjs, people, size, nadjs, nnouns, rng)
+                else:
+                    lines = events_batch(adjs, events, locs, size, nadjs, nnouns, rng)
+                print '\n'.join(lines)
+                continue
+
+            rand = line_random(block_seed)
+            for chars in range(0, size):
+                if not arguments['--event']:
+                    print character(adjs, people, nadjs, nnouns, rand)
+                else:
+                    print event(adjs, events, locs, nadjs, nnouns, rand)
 
+if __name__ == '__main__':
+    arguments = docopt(__doc__, version='Character Generator 0.1')
+    stats = Stats(enabled=arguments['--stats'])
+    with profiled(arguments['--profile']):
+        main(arguments, stats)
+    stats.report()
@@ -0,0 +1,4 @@
+"""Code shared by the chargen compiler, generator, renderer and GUI.
+
+chargenlib.pipeline has the API for compiling and rendering in-process.
+"""
@@ -0,0 +1,85 @@
+# encoding: utf-8
+"""Vectorized rendering of many lines at once with NumPy."""
+
+import numpy
+
+def random_state(seed):
+    """A NumPy generator for a block seed, or the global one."""
+    if seed is None:
+        return numpy.random
+    return numpy.random.RandomState(seed)
+
+def pick_batch(items, shape, rng=numpy.random):
+    """Pick an array of words with replacement."""
+    return numpy.asarray(list(items), dtype=object)[rng.randint(0, len(items), size=shape)]
+
+def alias_draw(table, rng, count):
+    """Draw count indexes from an AliasTable at once."""
+    prob = numpy.asarray(table.prob)
+    alias = numpy.asarray(table.alias)
+    idx = rng.randint(0, len(prob), size=count)
+    keep = rng.random_sample(count) < prob[idx]
+    return numpy.where(keep, idx, alias[idx])
+
+def draw_columns(size, unique, count, rng=numpy.random, table=None):
+    """Draw indices for several slots into one category, for count lines.
+
+    unique has a flag for each slot, in template order. Like a Sampler, no
+    slot may repeat an index drawn by an earlier unique slot in the same
+    line. Each column is redrawn only on the rows where it collides, which
+    gives the same distribution as drawing the slots one at a time. With
+    an AliasTable the indexes follow its weights instead of being uniform.
+    """
+    if size <= sum(unique[:-1]):
+        raise IndexError('not enough words for the unique slots')
+    idx = numpy.empty((count, len(unique)), dtype=numpy.intp)
+    for col in range(len(unique)):
+        earlier = [jj for jj in range(col) if unique[jj]]
+        rows = numpy.arange(count)
+        while len(rows):
+            if table is None:
+                idx[rows, col] = rng.randint(0, size, size=len(rows))
+            else:
+                idx[rows, col] = alias_draw(table, rng, len(rows))
+            clash = numpy.zeros(len(rows), dtype=bool)
+            for jj in earlier:
+                clash |= idx[rows, jj] == idx[rows, col]
+            rows = rows[clash]
+    return idx
+
+def render_batch(slots, joiner, categories, count, rng=numpy.random, tables={}):
+    """Render count lines from compiled template slots.
+
+    tables optionally maps categories to AliasTables for weighted draws.
+    """
+    # Literals are the same on every line, so they go in a format string
+    fmt = []
+    keys = []
+    for glue, literal, key, capital, unique in slots:
+        if not glue:
+            fmt.append(joiner.replace('%', '%%'))
+        if key is None:
+            fmt.append(literal.replace('%', '%%'))
+        else:
+            fmt.append('%s')
+            keys.append(key)
+    fmt = ''.join(fmt)
+
+    positions = {}
+    for pos, key in enumerate(keys):
+        positions.setdefault(key, []).append(pos)
+    slots = [slot for slot in slots if slot[2] is not None]
+    columns = [None] * len(slots)
+    for key, cols in positions.items():
+        words = numpy.asarray(list(categories[key]), dtype=object)
+        idx = draw_columns(len(words), [slots[cc][4] for cc in cols], count, rng,
+                tables.get(key))
+        picked = words[idx]
+        for jj, cc in enumerate(cols):
+            column = picked[:, jj].tolist()
+            if slots[cc][3]:
+                column = [word.capitalize() for word in column]
+            columns[cc] = column
+    if not columns:
+        return [fmt] * count
+    return [fmt % row for row in zip(*columns)]
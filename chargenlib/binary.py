@@ -0,0 +1,166 @@
+# encoding: utf-8
+"""Compact binary word list files.
+
+A file holds one sorted table of distinct words and, for each category,
+an ascending array of indexes into that table, so every category comes
+out sorted. Files are memory-mapped and a category's words are only
+decoded when it's first used. All integers are little-endian uint32.
+
+    "CHGN" version nstrings ncategories
+    offsets[nstrings + 1]      byte offsets of each word in the blob
+    blob                       utf-8 words, back to back
+    for each category:
+        namelen name count indexes[count]
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from itertools import chain, groupby
+from chargenlib.util import utf8, write_atomic
+
+MAGIC = 'CHGN'
+VERSION = 1
+HEADER = struct.Struct('<4sIII')
+UINT = struct.Struct('<I')
+
+def write_binary(data, fname):
+    """Write a dict of category -> words in the binary format."""
+    words = sorted(set(utf8(word) for key in data for word in data[key]))
+    lookup = dict((word, ii) for ii, word in enumerate(words))
+    offsets = array('I', [0])
+    for word in words:
+        offsets.append(offsets[-1] + len(word))
+    # Written to a temporary file and renamed, as the file may be mapped
+    with write_atomic(fname, 'wb') as ff:
+        ff.write(HEADER.pack(MAGIC, VERSION, len(words), len(data)))
+        ff.write(pack_uints(offsets))
+        ff.write(''.join(words))
+        for key in sorted(data):
+            name = utf8(key)
+            indexes = array('I', sorted(set(lookup[utf8(word)] for word in data[key])))
+            ff.write(UINT.pack(len(name)) + name + UINT.pack(len(indexes)))
+            ff.write(pack_uints(indexes))
+
+def pack_uints(arr):
+    return struct.pack('<%dI' % len(arr), *arr)
+
+def is_binary(fname):
+    with open(fname, 'rb') as ff:
+        return ff.read(len(MAGIC)) == MAGIC
+
+def read_uints(buf, offset, count):
+    """Read a uint32 array out of a buffer in one go."""
+    arr = array('I')
+    arr.fromstring(buf[offset:offset + 4 * count])
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return arr
+
+class StringTable(object):
+    """The word table of a mapped file; words are decoded on access."""
+
+    def __init__(self, buf, offset, count):
+        self.buf = buf
+        self.offsets = read_uints(buf, offset, count + 1)
+        self.blob = offset + 4 * (count + 1)
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def raw(self, ii):
+        """The utf-8 bytes of a word."""
+        return self.buf[self.blob + self.offsets[ii]:self.blob + self.offsets[ii + 1]]
+
+    def __getitem__(self, ii):
+        if not 0 <= ii < self.count:
+            raise IndexError(ii)
+        return self.raw(ii).decode('utf-8')
+
+    def raw_words(self):
+        """Every word's utf-8 bytes, in order."""
+        blob = self.buf[self.blob:self.end()]
+        offsets = self.offsets
+        return [blob[offsets[ii]:offsets[ii + 1]] for ii in range(self.count)]
+
+    def end(self):
+        """Byte offset just past the blob."""
+        return self.blob + self.offsets[self.count]
+
+class MergedStrings(list):
+    """utf-8 words in memory that look like a StringTable."""
+
+    def raw(self, ii):
+        return list.__getitem__(self, ii)
+
+    def __getitem__(self, ii):
+        return list.__getitem__(self, ii).decode('utf-8')
+
+class Category(object):
+    """A sequence of words given by indexes into a string table.
+
+    The words are decoded all at once the first time they're needed, so
+    draws after that are plain list lookups.
+    """
+
+    def __init__(self, strings, indexes):
+        self.strings = strings
+        self.indexes = indexes
+        self.decoded = None
+
+    def words(self):
+        if self.decoded is None:
+            strings = self.strings
+            self.decoded = [strings.raw(ii).decode('utf-8') for ii in self.indexes]
+        return self.decoded
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __getitem__(self, ii):
+        return self.words()[ii]
+
+    def __iter__(self):
+        return iter(self.words())
+
+def load_binary(fname):
+    """Map a binary word list file as a dict of category -> Category."""
+    with open(fname, 'rb') as ff:
+        buf = mmap.mmap(ff.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, nstrings, ncats = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Not a version %d word list file: %s' % (VERSION, fname))
+    strings = StringTable(buf, HEADER.size, nstrings)
+    pos = strings.end()
+    data = {}
+    for xx in range(ncats):
+        namelen = UINT.unpack_from(buf, pos)[0]
+        name = buf[pos + 4:pos + 4 + namelen].decode('utf-8')
+        count = UINT.unpack_from(buf, pos + 4 + namelen)[0]
+        pos += 8 + namelen
+        data[name] = Category(strings, read_uints(buf, pos, count))
+        pos += 4 * count
+    return data
+
+def merge_binary(files):
+    """Merge binary word list files without decoding their words.
+
+    Each category's words are merged as utf-8 bytes, which sort the same
+    way the decoded words do. Categories come out sorted and, as when
+    they're loaded, are decoded when they're first used.
+    """
+    parts = {}
+    for fname in files:
+        data = load_binary(fname)
+        if not data: continue
+        raw = iter(data.values()).next().strings.raw_words()
+        for key, cat in data.items():
+            parts.setdefault(key, []).append([raw[ii] for ii in cat.indexes])
+    merged = {}
+    for key, lists in parts.items():
+        # The lists are sorted runs, which sorted() merges in linear time
+        words = [word for word, dups in groupby(sorted(chain.from_iterable(lists)))]
+        merged[key] = Category(MergedStrings(words), xrange(len(words)))
+    return merged
@@ -0,0 +1,83 @@
+# encoding: utf-8
+"""Persistent cache of hypernym test results."""
+
+import hashlib
+import json
+import sqlite3
+
+def fingerprint(*parts):
+    """Hash anything JSON can encode into a short stable string."""
+    return hashlib.sha1(json.dumps(parts, sort_keys=True)).hexdigest()
+
+class ClassificationCache(object):
+    """Hypernym test results kept in a sqlite file between compiler runs.
+
+    Results are keyed by (word, hypernym). The file also records a
+    fingerprint of everything that can change a result - the WordNet
+    version, the hypernym config, the blacklists - and is emptied when the
+    fingerprint doesn't match. Everything is read into memory when the
+    cache is opened and new results are written back by save(). When there
+    are more than `limit` rows the ones unused for the most runs go first.
+    """
+
+    def __init__(self, path, fingerprint, limit=1000000):
+        self.limit = limit
+        self.db = sqlite3.connect(path)
+        self.db.text_factory = str # words are utf-8 bytestrings
+        self.db.execute('create table if not exists meta '
+                '(key text primary key, value text)')
+        self.db.execute('create table if not exists results '
+                '(word text, hyper text, result integer, used integer, '
+                'primary key (word, hyper))')
+        if self.meta('fingerprint') != fingerprint:
+            self.db.execute('delete from results')
+            self.set_meta('fingerprint', fingerprint)
+            self.db.commit()
+        self.run = int(self.meta('run') or 0) + 1
+        self.results = {}
+        for word, hyper, result in self.db.execute(
+                'select word, hyper, result from results'):
+            self.results[(word, hyper)] = bool(result)
+        self.used = set()
+        self.new = {}
+        self.hits = 0
+        self.misses = 0
+
+    def meta(self, key):
+        row = self.db.execute('select value from meta where key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.db.execute('insert or replace into meta values (?, ?)', (key, value))
+
+    def test(self, word, hyper, fallback):
+        """Return a cached result, or compute it with fallback and keep it."""
+        key = (word, hyper)
+        if key in self.results:
+            self.hits += 1
+            self.used.add(key)
+            return self.results[key]
+        self.misses += 1
+        result = fallback(word, hyper)
+        self.results[key] = self.new[key] = result
+        return result
+
+    def save(self):
+        """Write new results and usage to disk, then trim to the size limit."""
+        self.db.executemany('insert or replace into results values (?, ?, ?, ?)',
+                [(ww, hh, int(rr), self.run) for (ww, hh), rr in self.new.items()])
+        self.db.executemany('update results set used = ? where word = ? and hyper = ?',
+                [(self.run, ww, hh) for ww, hh in self.used])
+        count = self.db.execute('select count(*) from results').fetchone()[0]
+        if count > self.limit:
+            self.db.execute('delete from results where rowid in '
+                    '(select rowid from results order by used limit ?)',
+                    (count - self.limit,))
+        self.set_meta('run', str(self.run))
+        self.db.commit()
+        self.new = {}
+        self.used = set()
+
+    def close(self):
+        self.save()
+        self.db.close()
@@ -0,0 +1,94 @@
+# encoding: utf-8
+"""EDICT lookups through a sorted on-disk index.
+
+The index is built once from the EDICT file. It's a text file with one
+"headword<TAB>gloss/gloss/..." line per headword, sorted by headword, so
+a lookup is a binary search over the memory-mapped file. Nothing is read
+into memory up front; recently used entries are kept in a small LRU.
+"""
+
+import mmap
+import os
+import re
+from collections import OrderedDict
+from chargenlib.util import write_atomic
+
+def remove_parens(words):
+    """Remove parentheticals from a string."""
+    # Useful for edict definitions
+    return re.sub(r'\([^)]*\)', '', words)
+
+def strip_all(words):
+    return map(lambda x: x.strip(), words)
+
+def edict_setup(lines):
+    EDICT = {}
+    for line in lines:
+        parts = remove_parens(line).split('/')
+        if '[' in parts[0]:
+            keys = parts[0].split('[')[0].split(';')
+        else:
+            keys = parts[0].split(';')
+        keys = strip_all(keys)
+        vals = strip_all(parts[1:-2]) # last one is a code of some kind
+        for key in keys:
+            if not key in EDICT: EDICT[key] = []
+            EDICT[key] += vals
+    return EDICT
+
+def build_index(source, dest):
+    """Convert an EDICT file to a sorted index."""
+    with open(source) as ff:
+        edict = edict_setup(line.rstrip('\n') for line in ff)
+    # A half-built index is never used, even when several processes build
+    # it at once
+    with write_atomic(dest) as ff:
+        for key in sorted(edict):
+            vals = sorted(set(edict[key]))
+            if vals:
+                ff.write(key + '\t' + '/'.join(vals) + '\n')
+
+class EdictIndex(object):
+    """Memory-mapped lookups in an index made by build_index."""
+
+    def __init__(self, path, cache_size=10000):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+
+    def find(self, word):
+        # Lines before lo have smaller keys, lines from hi on don't
+        mm = self.map
+        lo, hi = 0, len(mm)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mm.rfind('\n', 0, mid) + 1
+            end = mm.find('\n', start)
+            if mm[start:mm.find('\t', start, end)] < word:
+                lo = end + 1
+            else:
+                hi = start
+        end = mm.find('\n', lo)
+        key, _, vals = mm[lo:end].partition('\t')
+        if end < 0 or key != word:
+            return ()
+        return tuple(vals.split('/'))
+
+    def translations(self, word):
+        """Return the English glosses of a word."""
+        if word in self.cache:
+            vals = self.cache.pop(word)
+        else:
+            vals = self.find(word)
+            if len(self.cache) >= self.cache_size:
+                self.cache.popitem(last=False)
+        self.cache[word] = vals
+        return vals
+
+def open_index(source, dest=None):
+    """Open the index for an EDICT file, building it if it's out of date."""
+    dest = dest or source + '.idx'
+    if not os.path.exists(dest) or os.path.getmtime(dest) < os.path.getmtime(source):
+        build_index(source, dest)
+    return EdictIndex(dest)
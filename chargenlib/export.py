@@ -0,0 +1,194 @@
+# encoding: utf-8
+"""Streaming export of compiled word lists.
+
+JSON input is scanned one value at a time, so a file is never held in
+memory as a whole. Categories are written sorted: binary files and most
+compiled JSON are sorted already and stream straight through, and only
+categories that aren't get sorted, one at a time.
+"""
+
+import json
+import re
+import sys
+from chargenlib.binary import is_binary, load_binary
+
+# Lines collected before each write
+BUFFER_LINES = 4096
+READ_SIZE = 65536
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+DECODER = json.JSONDecoder()
+
+class JSONScanner(object):
+    """Reads JSON values from a file one at a time."""
+
+    def __init__(self, ff, size=READ_SIZE):
+        self.ff = ff
+        self.size = size
+        self.buf = ''
+        self.pos = 0
+
+    def fill(self):
+        """Read another chunk, returning False at the end of the file."""
+        chunk = self.ff.read(self.size)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Skip whitespace and return the next character, '' at the end."""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars):
+        """Consume and return the next character, which must be in chars."""
+        char = self.peek()
+        if not char or not char in chars:
+            raise ValueError('Expected one of %r in JSON, got %r' % (chars, char))
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next value, reading more of the file if it's cut off."""
+        self.peek()
+        while True:
+            try:
+                obj, end = DECODER.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if not self.fill():
+                    raise
+                continue
+            # A number running up to the end of the buffer may go on in
+            # the next read
+            if end < len(self.buf) or not self.fill():
+                self.pos = end
+                return obj
+
+def iter_json(ff):
+    """Yield (category, words) from a JSON object of word lists.
+
+    words is a generator reading from ff, so it has to be used up before
+    the next category; any words left are skipped.
+    """
+    scanner = JSONScanner(ff)
+    scanner.expect('{')
+    if scanner.peek() == '}':
+        return
+    while True:
+        key = scanner.value()
+        scanner.expect(':')
+        words = iter_array(scanner)
+        yield key, words
+        for word in words: pass
+        if scanner.expect(',}') == '}':
+            return
+
+def iter_array(scanner):
+    scanner.expect('[')
+    if scanner.peek() == ']':
+        scanner.pos += 1
+        return
+    while True:
+        yield scanner.value()
+        if scanner.expect(',]') == ']':
+            return
+
+def unsorted_categories(ff):
+    """Return the categories of a JSON file whose words aren't sorted."""
+    unsorted = set()
+    for key, words in iter_json(ff):
+        prev = None
+        for word in words:
+            if prev is not None and word < prev:
+                unsorted.add(key)
+                break
+            prev = word
+    return unsorted
+
+def seekable(ff):
+    try:
+        ff.seek(0)
+        return True
+    except (IOError, AttributeError):
+        return False
+
+def sorted_json(ff):
+    """Yield (category, sorted words) from a JSON file of word lists.
+
+    A seekable file is read twice, first to find out which categories need
+    sorting; anything else, like a pipe, has every category sorted.
+    """
+    unsorted = None
+    if seekable(ff):
+        unsorted = unsorted_categories(ff)
+        ff.seek(0)
+    for key, words in iter_json(ff):
+        if unsorted is None or key in unsorted:
+            words = iter(sorted(words))
+        yield key, words
+
+def read_categories(fname):
+    """Yield (category, sorted words) from a compiled file, or stdin for '-'."""
+    if fname != '-' and is_binary(fname):
+        # Binary categories are always sorted
+        data = load_binary(fname)
+        for key in sorted(data):
+            yield key, iter(data[key])
+        return
+    ff = sys.stdin if fname == '-' else open(fname, 'rb')
+    try:
+        for key, words in sorted_json(ff):
+            yield key, words
+    finally:
+        if ff is not sys.stdin:
+            ff.close()
+
+def abulafia_lines(categories):
+    for key, words in categories:
+        yield u';' + key + u'\n'
+        for word in words:
+            yield u'1,' + word + u'\n'
+        yield u'\n'
+
+def csv_field(text):
+    if any(char in text for char in ',"\r\n'):
+        return u'"' + text.replace(u'"', u'""') + u'"'
+    return text
+
+def csv_lines(categories):
+    yield u'category,word\n'
+    for key, words in categories:
+        key = csv_field(key) + u','
+        for word in words:
+            yield key + csv_field(word) + u'\n'
+
+def ndjson_lines(categories):
+    for key, words in categories:
+        key = u'{"category": ' + json.dumps(key, ensure_ascii=False) + u', "word": '
+        for word in words:
+            yield key + json.dumps(word, ensure_ascii=False) + u'}\n'
+
+FORMATS = {
+    'abulafia': abulafia_lines,
+    'csv': csv_lines,
+    'ndjson': ndjson_lines,
+    }
+
+def write_lines(lines, out, size=BUFFER_LINES):
+    """Write unicode lines to out as utf-8, size lines at a time."""
+    buf = []
+    for line in lines:
+        buf.append(line)
+        if len(buf) >= size:
+            out.write(u''.join(buf).encode('utf-8'))
+            del buf[:]
+    out.write(u''.join(buf).encode('utf-8'))
+
+def export(fname, format, out=sys.stdout):
+    """Write a compiled word list file to out in one of FORMATS."""
+    write_lines(FORMATS[format](read_categories(fname)), out)
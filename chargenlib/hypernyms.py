@@ -0,0 +1,113 @@
+# encoding: utf-8
+"""Memoized WordNet hypernym lookups."""
+
+from itertools import chain
+from chargenlib.util import first
+
+def wordnet():
+    """Import WordNet on first use; loading NLTK is slow."""
+    from nltk.corpus import wordnet as wn
+    return wn
+
+class HypernymIndex(object):
+    """Answers "is this word a kind of that word" with set lookups.
+
+    The synsets of each target hypernym are resolved once, and each word's
+    chain of first hypernyms is walked once and kept as a frozenset.
+
+    With a translate function, words are looked up through their
+    translations: a word's ancestors are those of all its translations put
+    together, so it has a hypernym if any translation does. Each
+    translation is walked once, however many words share it.
+    """
+
+    def __init__(self, translate=None):
+        self.translate = translate
+        self.targets = {}
+        self.chains = {}
+        self.words = {}
+        # Chain lookups answered from memory and ones that walked WordNet
+        self.hits = 0
+        self.misses = 0
+
+    def target(self, hyper):
+        """Return the synsets of a target hypernym."""
+        if not hyper in self.targets:
+            self.targets[hyper] = frozenset(wordnet().synsets(hyper))
+        return self.targets[hyper]
+
+    def chain(self, word):
+        """Return the hypernym chain of the first noun sense of a word."""
+        if word in self.chains:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.chains[word] = self.walk(word)
+        return self.chains[word]
+
+    def ancestors(self, word):
+        if self.translate is None:
+            return self.chain(word)
+        if not word in self.words:
+            self.resolve(word, self.translate(word))
+        return self.words[word]
+
+    def resolve(self, word, translations):
+        self.words[word] = frozenset().union(*[self.chain(tt) for tt in translations])
+
+    def prime(self, words):
+        """Resolve the ancestors of many words at once.
+
+        Only useful with a translate function: the translations of all the
+        words are collected and each distinct one is walked once before the
+        results are mapped back to the words.
+        """
+        if self.translate is None: return
+        translations = dict((word, self.translate(word))
+                for word in set(words) if not word in self.words)
+        for tt in set(chain.from_iterable(translations.values())):
+            self.chain(tt)
+        for word, trans in translations.items():
+            self.resolve(word, trans)
+
+    def walk(self, word):
+        # Can't use lowest common hypernym function here because it's broken
+        # A chef is a person, but their lowest common hypernym is organism (through person).
+        # It's a bug and has been fixed but not yet released.
+        wn = wordnet()
+        syns = [syn for syn in wn.synsets(word) if syn.pos == wn.NOUN]
+        if not syns: return frozenset()
+        syn = first(syns)
+        chain = []
+        while syn != first(syn.root_hypernyms()):
+            syn = syn.hypernyms()
+            if not syn: break
+            syn = first(syn)
+            chain.append(syn)
+        return frozenset(chain)
+
+    def has_hypernym(self, word, hyper):
+        return not self.target(hyper).isdisjoint(self.ancestors(word))
+
+# Shared by everything in the process that doesn't need its own index
+INDEX = HypernymIndex()
+
+def has_hypernym(word, hyper):
+    return INDEX.has_hypernym(word, hyper)
+
+def classify(words, categories, test=has_hypernym, exclude={}):
+    """Sort words into categories in a single pass over the words.
+
+    categories maps a category name to a list of hypernyms, any of which
+    admits a word. exclude maps a category name to hypernyms that keep a
+    word out of it even if it would otherwise match.
+    """
+    data = dict((key, []) for key in categories)
+    for word in words:
+        for key, hypers in categories.items():
+            if not any(test(word, hh) for hh in hypers): continue
+            if any(test(word, hh) for hh in exclude.get(key, [])): continue
+            data[key].append(word)
+    for key in data:
+        data[key] = sorted(set(data[key]))
+    return data
@@ -0,0 +1,51 @@
+# encoding: utf-8
+"""Bookkeeping for updating a compiled word class file in place.
+
+Next to each compiled JSON file sits a state file recording the token/tag
+counts seen so far and fingerprints of the input files they came from.
+"""
+
+import hashlib
+import json
+import os
+from collections import Counter
+from chargenlib.util import utf8, write_atomic
+
+def load_json(fname):
+    with open(fname) as ff:
+        return utf8(json.load(ff))
+
+def state_path(fname):
+    return fname + '.state'
+
+def file_fingerprint(fname):
+    sha = hashlib.sha1()
+    with open(fname, 'rb') as ff:
+        for block in iter(lambda: ff.read(1 << 20), ''):
+            sha.update(block)
+    return sha.hexdigest()
+
+def load_state(fname):
+    """Return (fingerprints, counts) for a compiled file, empty if new."""
+    path = state_path(fname)
+    if not os.path.exists(path):
+        return set(), Counter()
+    state = load_json(path)
+    counts = Counter(dict(((token, tag), count)
+        for token, tag, count in state['counts']))
+    return set(state['files']), counts
+
+def save_state(fname, files, counts):
+    state = {
+            'files': sorted(files),
+            'counts': [[token, tag, count] for (token, tag), count in counts.items()]
+            }
+    with write_atomic(state_path(fname)) as ff:
+        json.dump(state, ff)
+
+def merge_classes(old, new):
+    """Union two word class dicts, keeping each list sorted."""
+    data = dict(old)
+    for key in new:
+        data[key] = sorted(set(data.get(key, [])) | set(new[key]))
+    return data
@@ -0,0 +1,110 @@
+# encoding: utf-8
+"""Opt-in timing, counters and progress events for long runs."""
+
+import resource
+import sys
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+def peak_rss():
+    """Peak resident set size of this process in MB."""
+    # ru_maxrss is in KB on Linux, bytes on OS X
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024.0 * 1024 if sys.platform == 'darwin' else 1024.0)
+
+class Stats(object):
+    """Per-stage wall time, call counts and peak memory.
+
+    Disabled stats do nothing, so callers can instrument unconditionally.
+    A listener, if given, is called with (event, name, value): "stage"
+    when a stage finishes, with its wall time, "total" when counted() is
+    given a sequence, with its length, and "progress" every `every` items
+    counted by counted(), with the running total.
+    """
+
+    def __init__(self, enabled=False, listener=None, every=1000):
+        self.enabled = enabled or listener is not None
+        self.listener = listener
+        self.every = every
+        self.stages = OrderedDict()
+        self.calls = Counter()
+        self.counts = Counter()
+        self.rss = OrderedDict()
+        self.rates = OrderedDict()
+
+    def emit(self, event, name, value):
+        if self.listener:
+            self.listener(event, name, value)
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.time()
+        try:
+            yield
+        finally:
+            elapsed = time.time() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            self.calls[name] += 1
+            self.rss[name] = peak_rss()
+            self.emit('stage', name, elapsed)
+
+    def counted(self, name, items):
+        """Pass items through, counting them and reporting progress."""
+        if not self.enabled:
+            return items
+        if hasattr(items, '__len__'):
+            self.emit('total', name, len(items))
+        return self._counted(name, items)
+
+    def _counted(self, name, items):
+        for item in items:
+            self.counts[name] += 1
+            if self.counts[name] % self.every == 0:
+                self.emit('progress', name, self.counts[name])
+            yield item
+        self.emit('progress', name, self.counts[name])
+
+    def hit_rate(self, name, hits, misses):
+        """Record a cache's hit rate."""
+        if self.enabled and hits + misses:
+            self.rates[name] = (hits, misses)
+
+    def report(self, out=sys.stderr):
+        if not self.enabled: return
+        for name, seconds in self.stages.items():
+            out.write('%-12s %9.3fs %6d calls %9.1f MB peak\n' % (
+                name, seconds, self.calls[name], self.rss[name]))
+        for name, count in sorted(self.counts.items()):
+            out.write('%-24s %d\n' % (name, count))
+        for name, (hits, misses) in self.rates.items():
+            out.write('%-24s %5.1f%% of %d\n' % (name + ' hits',
+                100.0 * hits / (hits + misses), hits + misses))
+
+def log_progress(event, name, value, out=None):
+    """A Stats listener that writes each event to stderr as it happens."""
+    out = out or sys.stderr
+    if event == 'progress':
+        out.write('%s: %d\n' % (name, value))
+    elif event == 'total':
+        out.write('%s: %d to go\n' % (name, value))
+    else:
+        out.write('%s: done in %.3fs\n' % (name, value))
+
+@contextmanager
+def profiled(fname):
+    """Run the body under cProfile and dump the stats to fname, if given."""
+    if not fname:
+        yield
+        return
+    import cProfile
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(fname)
@@ -0,0 +1,294 @@
+# encoding: utf-8
+"""The tag -> clean -> classify -> sample pipeline.
+
+Compiler turns text into word classes and Renderer turns word classes
+into lines, so other programs can run both in-process:
+
+    compiler = Compiler()
+    with open('book.txt') as ff:
+        words = compiler.compile(ff)
+    for line in Renderer(words).render_lines('The %jj :person', 10, seed=1):
+        print line
+"""
+
+import os
+import threading
+from collections import Counter, OrderedDict
+from random import random
+from chargenlib.cache import ClassificationCache, fingerprint
+from chargenlib.edict import open_index
+from chargenlib.hypernyms import HypernymIndex, classify, wordnet
+from chargenlib.instrument import Stats
+from chargenlib.sampler import Sampler, WeightedSampler
+from chargenlib.streams import blocks, line_random
+from chargenlib.tagging import count_english, load_tagger, sentences, tag_mecab
+from chargenlib.template import compile_template, render
+from chargenlib.util import first
+from chargenlib.weights import WEIGHTINGS, AliasTable, word_weights
+
+def pick(ll, random=random):
+    """Pick a random element from a list"""
+    return ll[int(random() * len(ll))]
+
+# blacklists are important
+BLACKLISTS = {
+        # Quantifiers and ordinals aren't interesting
+        'JJ': frozenset(["not", "no", "don't", 'some','many','quite','very','one','last','first','several','write','next','along']),
+        # Besides racist terms, Wordnet considers most color words to represent people
+        # These are usually obscure enough to be uninteresting, like "blue" and "gray" for soldiers in the American Civil War
+        # Some of these are just weird, boring, or rarely intended in the sense that means person
+        'NN': frozenset(['man', 'woman', 'person','queer', 'faggot', 'oriental', 'gay', 'jew', 'gyp', 'gypsy',
+            'negro', 'nigger', 'chink', 'nip', 'jap', 'pickaninny', 'black', 'red', 'white',
+            'yellow', 'pink', 'blue', 'grey', 'gray', 'screw'])
+}
+
+CATEGORIES = {
+    'locations': ['location', 'structure'],
+    'events': ['event'],
+    'items': ['item', 'artifact'],
+    'food': ['food'],
+    'people': ['person'],
+    'trait': ['trait'],
+    'abstraction': ['abstraction']
+    }
+
+# Locations get stupid stuff if you allow body parts
+EXCLUDE = {'locations': ['body part']}
+
+# simple edict format, one entry per line
+EDICT_FILE = 'jp/edict2'
+
+# These are nouns that take "no" and are functionally adjectives
+# This has most everything that works that way, though "na" is preferred when reasonable
+# example: 黄金のXX,架空のXX
+# The list was made using wwwjdic
+NO_ADJ_FILE = 'jp/noadj.txt'
+#TODO: get list of suru verbs
+
+def cleanup_tagged(tagged, test, tags=None):
+    """Remove unnecessary and garbage words from the tagger output.
+
+    Returns a dict of tag -> set of words, built in one pass. If tags is
+    given, other tags are dropped before any filtering. test is the
+    hypernym test, used to drop numbers.
+    """
+    buckets = {}
+    for token, tag in tagged:
+        if tags and not tag in tags: continue
+        # First make everything lowercase
+        word = token.lower()
+        # Remove any plaintext tables
+        if not word or '|' in word or '_' in word: continue
+        # Single quotes are often not separated properly by the tagger, so aggressively remove them here
+        if "'" == word[0] or "'" == word[-1]: continue
+        buckets.setdefault(tag, set()).add(word)
+    # We don't need any numbers. This is the only filter that needs
+    # WordNet, so it only sees the words that got past the others, once each.
+    words = set().union(*buckets.values())
+    numbers = set(word for word in words if test(word, 'number'))
+    for tag in buckets:
+        buckets[tag] -= numbers
+    return buckets
+
+def select_by_tag(buckets, tag, blacklists=BLACKLISTS):
+    blacklist = blacklists.get(tag, frozenset())
+    return [word for word in buckets.get(tag, ()) if not word in blacklist]
+
+def word_counts(counts, data):
+    """Total the token/tag counts for each word in the word classes."""
+    totals = Counter()
+    for (token, tag), count in counts.items():
+        totals[token.lower()] += count
+    words = set(word for key in data for word in data[key])
+    return dict((word, totals[word]) for word in words)
+
+class Compiler(object):
+    """Compiles text into word classes.
+
+    The hypernym indexes, the EDICT index and the optional sqlite cache
+    live here, so keep one Compiler for many compiles. Japanese input
+    should be MeCab output.
+    """
+
+    def __init__(self, japanese=False, stats=None):
+        self.japanese = japanese
+        self.stats = stats or Stats()
+        self.cache = None
+        self.edict = None
+        self.no_adj = None
+        self.hypernyms = HypernymIndex()
+        # optimistic in that *any* translation could work
+        self.hypernyms_jp = HypernymIndex(translate=self.translate)
+
+    def translate(self, word):
+        """Get edict translations of a word"""
+        # very poor as a translator, but good enough for wordnet
+        if self.edict is None:
+            self.edict = open_index(EDICT_FILE)
+        return self.edict.translations(word)
+
+    def test(self, word, hyper):
+        """Is hyper a hypernym of word?"""
+        index = self.hypernyms_jp if self.japanese else self.hypernyms
+        if self.cache:
+            return self.cache.test(word, hyper, index.has_hypernym)
+        return index.has_hypernym(word, hyper)
+
+    def fingerprint(self, categories=CATEGORIES):
+        """Everything that can change a cached hypernym result."""
+        edict = os.path.getmtime(EDICT_FILE) if self.japanese else None
+        blacklists = dict((tag, sorted(words)) for tag, words in BLACKLISTS.items())
+        return fingerprint(wordnet().get_version(), self.japanese, edict, categories, blacklists)
+
+    def open_cache(self, path, limit=1000000, categories=CATEGORIES):
+        """Keep hypernym results in a sqlite file between runs."""
+        self.cache = ClassificationCache(path, self.fingerprint(categories), limit)
+
+    def tag(self, lines, jobs=1):
+        """Return a Counter with the token/tag pairs in lines of text."""
+        # The pairs are counted as they're tagged, so only the vocabulary is
+        # ever held in memory
+        with self.stats.stage('tag'):
+            if self.japanese:
+                if self.no_adj is None:
+                    with open(NO_ADJ_FILE) as ff:
+                        self.no_adj = frozenset(ff.read().split("\n"))
+                return Counter(self.stats.counted('tokens tagged', tag_mecab(lines, self.no_adj)))
+            sents = self.stats.counted('sentences tagged', sentences(lines))
+            return count_english(sents, jobs)
+
+    def parse_tagged(self, tagged, categories=CATEGORIES, exclude=EXCLUDE, names=False):
+        """Sort a list of token/tag pairs into word classes.
+
+        Adjectives always get a class of their own, and with names so do
+        proper nouns.
+        """
+        tags = ('JJ', 'NN', 'NNP') if names else ('JJ', 'NN')
+        if self.japanese and not self.cache:
+            # Walk each English gloss once for the whole vocabulary. With a
+            # cache most words never get as far as the glosses.
+            with self.stats.stage('prime'):
+                self.hypernyms_jp.prime(first(x).lower() for x in tagged)
+        with self.stats.stage('cleanup'):
+            buckets = cleanup_tagged(tagged, self.test, tags)
+
+        with self.stats.stage('select'):
+            adjs = select_by_tag(buckets, 'JJ')
+            nouns = select_by_tag(buckets, 'NN')
+
+        data = {'adjectives': sorted(adjs)}
+        if names:
+            data['names'] = sorted(select_by_tag(buckets, 'NNP'))
+
+        with self.stats.stage('classify'):
+            nouns = self.stats.counted('nouns classified', nouns)
+            data.update(classify(nouns, categories, self.test, exclude))
+
+        return data
+
+    def compile(self, lines, categories=CATEGORIES, jobs=1, **options):
+        """Compile lines of text into a dict of word classes.
+
+        Other options are passed on to parse_tagged.
+        """
+        # TODO - change smart quotes to plain quotes
+        return self.parse_tagged(self.tag(lines, jobs).keys(), categories, **options)
+
+    def warm_up(self):
+        """Load the models every compile needs, ahead of the first one."""
+        # Japanese input is already tagged by MeCab
+        if self.japanese:
+            self.translate('')
+        else:
+            load_tagger()
+        wordnet().synsets('person') # WordNet loads lazily on the first lookup
+
+    def close(self):
+        """Record cache hit rates in the stats and save the cache."""
+        self.stats.hit_rate('hypernym index', self.hypernyms.hits, self.hypernyms.misses)
+        self.stats.hit_rate('gloss index', self.hypernyms_jp.hits, self.hypernyms_jp.misses)
+        if self.cache:
+            self.stats.hit_rate('sqlite cache', self.cache.hits, self.cache.misses)
+            self.cache.close()
+
+class Renderer(object):
+    """Renders templates from a dict of word classes.
+
+    Alias tables and the last `cache_size` compiled templates are kept,
+    so keep one Renderer for many renders. It can be shared between
+    threads. With counts from chargen-compiler --counts, words
+    are picked by one of WEIGHTINGS instead of uniformly. Raises
+    ValueError for an unknown weighting or a temperature that isn't
+    positive.
+    """
+
+    def __init__(self, words, japanese=False, counts=None, weighting='frequency', temperature=1.0,
+            cache_size=1000):
+        if not weighting in WEIGHTINGS:
+            raise ValueError('Unknown weighting: ' + weighting)
+        if not temperature > 0:
+            raise ValueError('Temperature must be positive: %s' % temperature)
+        self.words = words
+        self.joiner = '' if japanese else ' '
+        self.weights = None
+        if counts is not None and weighting != 'uniform':
+            self.weights = lambda ws: word_weights(ws, counts, weighting, temperature)
+        self.templates = OrderedDict()
+        self.cache_size = cache_size
+        self.tables = {}
+        # The categories templates use, as lists
+        self.lists = {}
+        self.lock = threading.Lock()
+
+    def compile(self, template):
+        """Compile a template string, raising ValueError for an unknown category."""
+        with self.lock:
+            if template in self.templates:
+                slots = self.templates.pop(template)
+            else:
+                slots = compile_template(template.split(' '), self.words)
+                for slot in slots:
+                    key = slot[2]
+                    if key is None or key in self.lists: continue
+                    # Plain lists are the cheapest to draw from, so mapped
+                    # binary categories are decoded once here
+                    words = self.words[key]
+                    self.lists[key] = words if isinstance(words, list) else list(words)
+                    if self.weights:
+                        # Alias tables for every weighted category, built once
+                        self.tables[key] = AliasTable(self.weights(self.lists[key]))
+                if len(self.templates) >= self.cache_size:
+                    self.templates.popitem(last=False)
+            self.templates[template] = slots
+            return slots
+
+    def render_blocks(self, template, count=1, seed=None, shard=0, shards=1, batch=False):
+        """Yield the rendered lines in lists, one per seed block.
+
+        The same seed and count give the same lines, whichever shards of
+        them are rendered; see chargenlib.streams. Batches are drawn with
+        NumPy and differ from normal output for the same seed.
+        """
+        slots = self.compile(template)
+        if batch:
+            # NumPy is only worth loading for batches
+            from chargenlib.batch import random_state, render_batch
+        for size, block_seed in blocks(count, seed, shard, shards):
+            if batch:
+                rng = random_state(block_seed)
+                yield render_batch(slots, self.joiner, self.lists, size, rng, self.tables)
+                continue
+            if self.weights:
+                sampler = WeightedSampler(self.lists, self.weights, line_random(block_seed), self.tables)
+            else:
+                sampler = Sampler(self.lists, line_random(block_seed))
+            yield [render(slots, self.joiner, sampler) for xx in range(size)]
+
+    def render_lines(self, template, count=1, seed=None, **options):
+        """Render a template count times, one line at a time.
+
+        Options are as for render_blocks.
+        """
+        for lines in self.render_blocks(template, count, seed, **options):
+            for line in lines:
+                yield line
@@ -0,0 +1,75 @@
+# encoding: utf-8
+"""Random draws from word categories."""
+
+from random import random
+from chargenlib.weights import AliasTable
+
+class Sampler(object):
+    """Draws words from categories, with or without replacement.
+
+    Draws without replacement are a sparse Fisher-Yates shuffle: the first
+    `drawn` positions of a category hold the words used so far, and only
+    positions that have been swapped are recorded. reset() throws the swaps
+    away, so a sentence costs time in its own length and never copies a
+    category. Draws with replacement still skip words already used.
+    """
+
+    def __init__(self, categories, random=random):
+        self.categories = categories
+        self.random = random
+        self.reset()
+
+    def reset(self):
+        """Put every word back, ready for a new sentence."""
+        self.swaps = {}
+        self.drawn = {}
+
+    def draw(self, key, unique=False):
+        items = self.categories[key]
+        drawn = self.drawn.get(key, 0)
+        if drawn >= len(items):
+            raise IndexError('no words left in ' + key)
+        swaps = self.swaps.setdefault(key, {})
+        pos = drawn + int(self.random() * (len(items) - drawn))
+        index = swaps.get(pos, pos)
+        if unique:
+            # Move the word at the front of the remaining ones into its place
+            swaps[pos] = swaps.get(drawn, drawn)
+            self.drawn[key] = drawn + 1
+        return items[index]
+
+class WeightedSampler(Sampler):
+    """A Sampler whose draws follow per-category weights.
+
+    Each category gets an alias table the first time it's drawn from, so
+    every draw after that is O(1). Tables can be shared between samplers
+    by passing the same dict. Words already drawn uniquely in the sentence
+    are rejected and redrawn.
+    """
+
+    def __init__(self, categories, weights, random=random, tables=None):
+        # weights takes a list of words and returns their weights
+        self.weights = weights
+        self.tables = {} if tables is None else tables
+        Sampler.__init__(self, categories, random)
+
+    def reset(self):
+        self.used = {}
+
+    def table(self, key):
+        if not key in self.tables:
+            self.tables[key] = AliasTable(self.weights(list(self.categories[key])))
+        return self.tables[key]
+
+    def draw(self, key, unique=False):
+        items = self.categories[key]
+        table = self.table(key)
+        used = self.used.setdefault(key, set())
+        if len(used) >= len(items):
+            raise IndexError('no words left in ' + key)
+        index = table.draw(self.random)
+        while index in used:
+            index = table.draw(self.random)
+        if unique:
+            used.add(index)
+        return items[index]
@@ -0,0 +1,43 @@
+# encoding: utf-8
+"""Reproducible random streams that can be split across processes.
+
+Output is generated in fixed blocks of lines, and each block draws from
+its own generator, seeded from the run's seed and the block number. A
+shard renders a contiguous run of whole blocks, so concatenating the
+shards in order gives the same output as one process with the same seed,
+however many shards there are.
+"""
+
+import hashlib
+import random
+
+BLOCK_SIZE = 65536
+
+def block_seed(seed, block):
+    """Derive a 32 bit seed for one block."""
+    # Not hash(): it differs between 32 and 64 bit builds
+    return int(hashlib.sha1('%d:%d' % (seed, block)).hexdigest()[:8], 16)
+
+def parse_shard(text):
+    """Turn "K/N" into a zero based (shard, shards) pair."""
+    shard, _, shards = text.partition('/')
+    shard, shards = int(shard), int(shards)
+    if not 1 <= shard <= shards:
+        raise ValueError('Shard must be between 1 and the number of shards: ' + text)
+    return shard - 1, shards
+
+def blocks(count, seed=None, shard=0, shards=1, size=BLOCK_SIZE):
+    """Yield (lines, seed) for each block of count lines in this shard.
+
+    The seed is None if the run isn't seeded.
+    """
+    nblocks = (count + size - 1) // size
+    for block in range(shard * nblocks // shards, (shard + 1) * nblocks // shards):
+        lines = min(size, count - block * size)
+        yield lines, (None if seed is None else block_seed(seed, block))
+
+def line_random(seed):
+    """A random() function for a block seed, or the global one."""
+    if seed is None:
+        return random.random
+    return random.Random(seed).random
@@ -0,0 +1,98 @@
+# encoding: utf-8
+"""Streaming POS tagging."""
+
+import re
+from collections import Counter, deque
+
+def sentences(lines):
+    """Lazily split lines of text into sentences."""
+    # Splitting on periods sacrifices accuracy for speed. Only the sentence
+    # being read is held in memory, not the document.
+    partial = ''
+    for line in lines:
+        parts = (partial + line.strip() + ' ').split('.')
+        partial = parts.pop()
+        for part in parts:
+            yield part
+    yield partial
+
+def tag_english(sents):
+    """Yield token/POS pairs for a stream of sentences."""
+    import nltk
+    for sent in sents:
+        for pair in nltk.pos_tag(nltk.word_tokenize(sent)):
+            yield pair
+
+def chunks(iterable, size):
+    """Group an iterable into lists of at most size items."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def load_tagger():
+    # Runs once in each worker, so chunks don't pay for unpickling the tagger
+    import nltk
+    nltk.data.load(nltk.tag._POS_TAGGER)
+
+def _count_chunk(sents):
+    return Counter(tag_english(sents))
+
+def count_english(sents, jobs=1, chunksize=500):
+    """Return a Counter of token/POS pairs for a stream of sentences.
+
+    With more than one job the sentences are tagged in chunks by a process
+    pool and the partial counts merged; the result is the same as tagging
+    them here. Only a few chunks per worker are read ahead of the pool.
+    """
+    if jobs <= 1:
+        return Counter(tag_english(sents))
+    from multiprocessing import Pool
+    counts = Counter()
+    pending = deque()
+    pool = Pool(jobs, load_tagger)
+    try:
+        for chunk in chunks(sents, chunksize):
+            pending.append(pool.apply_async(_count_chunk, (chunk,)))
+            if len(pending) >= jobs * 2:
+                counts.update(pending.popleft().get())
+        while pending:
+            counts.update(pending.popleft().get())
+        pool.close()
+    finally:
+        pool.terminate()
+    return counts
+
+def ishiragana(word):
+    return re.search('^[ぁ-ゞ]$', word)
+
+def tag_mecab(lines, no_adj=frozenset()):
+    """Yield token/POS pairs from a stream of MeCab output lines.
+
+    no_adj is a set of nouns that take "no" and work as adjectives. Only
+    the feature fields that are needed are split off each line.
+    """
+    for line in lines:
+        line = line.strip()
+        if line == 'EOS' or line == '': continue
+        word, _, info = line.partition("\t")
+        base_pos, _, rest = info.partition(',') # 名詞, 動詞, 形容詞など
+        detail_pos = rest.partition(',')[0] # 形容動詞語幹, 一般
+
+        if base_pos == '名詞':
+            if detail_pos == '一般':
+                if word in no_adj: # no-adjectives 黄金
+                    yield (word + 'の', 'JJ')
+                # reject nouns that are only hiragana; most are bad
+                elif not ishiragana(word):
+                    yield (word, 'NN') # normal nouns
+            elif detail_pos == '形容動詞語幹': # na-adjectives 綺麗
+                yield (word + 'な', 'JJ')
+        elif base_pos == '形容詞' and detail_pos == '自立': # i-adjectives 新しい
+            # っぽい is an example of a different detail_pos - rare and undesirable
+            # Base form, so 新しい even if 新しくis in the text
+            yield (info.split(',', 7)[6], 'JJ')
@@ -0,0 +1,64 @@
+# encoding: utf-8
+"""Templates compiled to a list of slots, rendered with a Sampler."""
+
+#For convenience. Feel free to add.
+MAPPINGS = {
+        'jj': 'adjectives',
+        'person': 'people',
+        'loc': 'locations',
+        'event': 'events',
+        'item': 'items',
+        'name': 'names'
+        }
+
+def compile_template(template, categories, mappings=MAPPINGS):
+    """Turn a list of template tokens into slots.
+
+    Each slot is a (glue, literal, category, capital, unique) tuple. Glued
+    slots - punctuation and 's - attach to the previous word without a
+    joiner. Category slots have no literal. Raises ValueError for a
+    category that isn't in categories, or that runs out of words because
+    of the unique slots before one of its slots.
+    """
+    slots = []
+    # Unique slots so far for each category
+    taken = {}
+    for token in template:
+        if token[0:2] == "'s" or token in ',!?:;.':
+            slots.append((True, token, None, False, False))
+            continue
+        # Pass through non-special tokens
+        if token[0] not in '%:':
+            slots.append((False, token, None, False, False))
+            continue
+
+        # Can this word re-occur in a single output?
+        unique = (token[0] == '%')
+        name = token[1:]
+        capital = (name[0:1] == '!')
+        if capital: name = name[1:]
+
+        # Use a mapping if needed
+        key = mappings.get(name, name)
+        if not key in categories:
+            raise ValueError('Unknown category in template: ' + token)
+        if taken.get(key, 0) >= len(categories[key]):
+            raise ValueError('Not enough words in %s for template: %s' % (key, token))
+        if unique:
+            taken[key] = taken.get(key, 0) + 1
+        slots.append((False, None, key, capital, unique))
+    return slots
+
+def render(slots, joiner, sampler):
+    """Render compiled slots into one line."""
+    sampler.reset() # Unique results only have to be unique in one sentence
+    parts = []
+    for glue, literal, key, capital, unique in slots:
+        if not glue:
+            parts.append(joiner)
+        if key is None:
+            parts.append(literal)
+            continue
+        word = sampler.draw(key, unique)
+        parts.append(word.capitalize() if capital else word)
+    return ''.join(parts)
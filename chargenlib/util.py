@@ -0,0 +1,36 @@
+# encoding: utf-8
+"""Small helpers shared by the other modules."""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+def first(ll): return ll[0]
+
+def utf8(obj):
+    """Turn the unicode strings json gives back into utf-8 bytestrings."""
+    # Tagger output is bytestrings; mixing the two breaks sorting and lookups
+    if isinstance(obj, unicode):
+        return obj.encode('utf-8')
+    if isinstance(obj, list):
+        return [utf8(x) for x in obj]
+    if isinstance(obj, dict):
+        return dict((utf8(k), utf8(v)) for k, v in obj.items())
+    return obj
+
+@contextmanager
+def write_atomic(fname, mode='w'):
+    """Open a file to replace fname, so it's never seen half written.
+
+    The file is written under a unique temporary name and renamed over
+    fname at the end of the with block, or removed if the block raises.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(fname)))
+    try:
+        with os.fdopen(fd, mode) as ff:
+            yield ff
+        os.chmod(tmp, 0o644) # mkstemp makes files only the owner can read
+        os.rename(tmp, fname)
+    except:
+        os.remove(tmp)
+        raise
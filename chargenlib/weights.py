@@ -0,0 +1,56 @@
+# encoding: utf-8
+"""Weighted draws through alias tables."""
+
+import json
+
+WEIGHTINGS = ('uniform', 'frequency', 'inverse')
+
+def load_counts(fname):
+    """Load a word -> count file written by chargen-compiler --counts."""
+    with open(fname) as ff:
+        return json.load(ff)
+
+def word_weights(words, counts, weighting='frequency', temperature=1.0):
+    """Return a weight for each word, or None for uniform weighting.
+
+    Frequency weighting uses count ** (1 / temperature) and inverse
+    weighting its reciprocal, so high temperatures flatten either one
+    towards uniform. Words without a count, or with a count of zero,
+    count once.
+    """
+    if weighting == 'uniform':
+        return None
+    if not weighting in WEIGHTINGS:
+        raise ValueError('Unknown weighting: ' + weighting)
+    power = 1.0 / temperature
+    if weighting == 'inverse':
+        power = -power
+    return [float(max(counts.get(word, 1), 1)) ** power for word in words]
+
+class AliasTable(object):
+    """Walker's alias method: O(1) draws from a discrete distribution."""
+
+    def __init__(self, weights):
+        nn = len(weights)
+        total = float(sum(weights))
+        scaled = [ww * nn / total for ww in weights]
+        self.prob = [1.0] * nn
+        self.alias = range(nn)
+        small = [ii for ii, pp in enumerate(scaled) if pp < 1.0]
+        large = [ii for ii, pp in enumerate(scaled) if pp >= 1.0]
+        while small and large:
+            ss, ll = small.pop(), large.pop()
+            self.prob[ss] = scaled[ss]
+            self.alias[ss] = ll
+            scaled[ll] -= 1.0 - scaled[ss]
+            (small if scaled[ll] < 1.0 else large).append(ll)
+        # Anything left over is 1 up to rounding error, so keeps prob 1
+
+    def __len__(self):
+        return len(self.prob)
+
+    def draw(self, random):
+        ii = int(random() * len(self.prob))
+        if random() < self.prob[ii]:
+            return ii
+        return self.alias[ii]
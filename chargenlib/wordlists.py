@@ -0,0 +1,72 @@
+# encoding: utf-8
+"""Loading and merging compiled word list files."""
+
+import json
+import os
+import threading
+import time
+from chargenlib.binary import is_binary, load_binary, merge_binary
+
+def dictmerge(dicts):
+    """Merge together a list of dictionaries, keeping all values."""
+    # Each key maps to a list of strings.
+    master = {}
+    for dd in dicts:
+        for key in dd:
+            if not key in master:
+                master[key] = []
+            master[key] = list(set(master[key] + list(dd[key])))
+    return master
+
+def load_file(fname):
+    if is_binary(fname):
+        return load_binary(fname)
+    input_file = open(fname)
+    data = json.loads(input_file.read())
+    input_file.close()
+    return data
+
+def load_wordlists(files):
+    """Load and merge word list files, JSON or binary.
+
+    Every category comes back without repeated words.
+    """
+    if all(is_binary(ff) for ff in files):
+        # Binary files never repeat a word, so one can be used as it is
+        return load_binary(files[0]) if len(files) == 1 else merge_binary(files)
+    return dictmerge(map(load_file, files))
+
+class WordLists(object):
+    """Merged word lists that reload when their files change.
+
+    The files are checked at most once every `interval` seconds, so most
+    calls to current() are a lock and a clock read. Anything derived from
+    the words, like compiled templates, can be kept in the `derived` dict,
+    which is replaced on every reload.
+    """
+
+    def __init__(self, files, interval=1.0):
+        self.files = files
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.checked = 0
+        self.mtimes = None
+        self.reload()
+
+    def stat(self):
+        return [os.path.getmtime(ff) for ff in self.files]
+
+    def reload(self):
+        mtimes = self.stat()
+        words = load_wordlists(self.files)
+        self.words, self.derived, self.mtimes = words, {}, mtimes
+
+    def current(self):
+        """Return (words, derived), reloading first if a file changed."""
+        with self.lock:
+            now = time.time()
+            if now - self.checked >= self.interval:
+                self.checked = now
+                if self.stat() != self.mtimes:
+                    self.reload()
+            return self.words, self.derived
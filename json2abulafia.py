@@ -1,16 +1,23 @@
-import fileinput, json, codecs, sys
-source =''
-for line in fileinput.input():
-    source += line.strip() + ' '
+#!/usr/bin/env python
+"""Export compiled word lists.
 
-writer = codecs.getwriter('utf8')
-sys.stdout = writer(sys.stdout)
+Usage:
+  json2abulafia [--format=F] [<file>]
 
-data = json.loads(source)
-for key in data:
-    print ";" + key
-    for val in sorted(data[key]):
-        print "1," + val
-    print ""
+Reads a compiled JSON or binary word list file, or JSON on stdin if no file
+is given, and prints every category sorted. Files are read incrementally,
+so memory use doesn't grow with their size.
 
+Options:
+  -f F --format F   One of abulafia, csv or ndjson. [default: abulafia]
+"""
 
+import sys
+from docopt import docopt
+from chargenlib.export import FORMATS, export
+
+if __name__ == '__main__':
+    arguments = docopt(__doc__)
+    if not arguments['--format'] in FORMATS:
+        sys.exit('Unknown format: ' + arguments['--format'])
+    export(arguments['<file>'] or '-', arguments['--format'])
@@ -0,0 +1,43 @@
+"""Vectorized draws for --batch."""
+
+import unittest
+
+try:
+    import numpy
+    from chargenlib.batch import draw_columns
+    from chargenlib.weights import AliasTable
+except ImportError:
+    numpy = None
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class DrawColumnsTest(unittest.TestCase):
+
+    def test_unique_columns_never_clash(self):
+        rng = numpy.random.RandomState(1)
+        idx = draw_columns(3, [True, True, False], 2000, rng)
+        self.assertEqual(idx.shape, (2000, 3))
+        for row in idx.tolist():
+            self.assertEqual(len(set(row)), 3)
+
+    def test_repeats_allowed_before_unique_slots(self):
+        rng = numpy.random.RandomState(2)
+        idx = draw_columns(2, [False, False], 2000, rng)
+        self.assertTrue((idx[:, 0] == idx[:, 1]).any())
+
+    def test_redraws_stay_uniform(self):
+        rng = numpy.random.RandomState(3)
+        idx = draw_columns(4, [True, True], 40000, rng)
+        counts = numpy.bincount(idx[:, 1], minlength=4)
+        self.assertTrue((abs(counts - 10000) < 500).all(), counts)
+
+    def test_weighted_columns(self):
+        rng = numpy.random.RandomState(4)
+        idx = draw_columns(3, [True, True], 2000, rng, AliasTable([50.0, 1.0, 1.0]))
+        self.assertTrue((idx[:, 0] != idx[:, 1]).all())
+        self.assertTrue((idx[:, 0] == 0).mean() > 0.8)
+
+    def test_not_enough_words(self):
+        self.assertRaises(IndexError, draw_columns, 2, [True, True, False], 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+"""EDICT index building and lookups."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from chargenlib.edict import open_index
+
+EDICT = [
+    '\xe7\x8a\xac [\xe3\x81\x84\xe3\x81\xac] /(n) dog/EntL1/',
+    '\xe7\x8c\xab [\xe3\x81\xad\xe3\x81\x93] /(n) cat/(n) pussycat/EntL2/',
+    'ABC /(n) alphabet/EntL3/',
+    'ABD /(n) something else/EntL4/',
+    ]
+
+class EdictIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        source = os.path.join(self.tmp, 'edict')
+        with open(source, 'w') as ff:
+            ff.write('\n'.join(EDICT) + '\n')
+        self.index = open_index(source)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_find(self):
+        self.assertEqual(self.index.find('ABC'), ('alphabet',))
+        self.assertEqual(self.index.find('ABD'), ('something else',))
+        self.assertEqual(self.index.find('\xe7\x8c\xab'), ('cat', 'pussycat'))
+        # First and last lines of the index
+        self.assertEqual(self.index.find('\xe7\x8a\xac'), ('dog',))
+
+    def test_find_missing(self):
+        for word in ['', 'AB', 'ABCD', 'AAA', 'ZZZ', '\xff']:
+            self.assertEqual(self.index.find(word), ())
+
+    def test_translations_are_cached(self):
+        self.index.translations('ABC')
+        self.assertEqual(self.index.translations('ABC'), ('alphabet',))
+        self.assertEqual(list(self.index.cache), ['ABC'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+# encoding: utf-8
+"""Streaming JSON reads and exports."""
+
+import json
+import unittest
+from StringIO import StringIO
+from chargenlib.export import JSONScanner, csv_lines, iter_json, sorted_json
+
+DATA = {u'people': [u'chef', u'baker', u'先生'], u'empty': [], u'items': [u'cup, "big"']}
+
+class Unseekable(object):
+    """A file like a pipe, which may return less than it's asked for."""
+
+    def __init__(self, text, most=None):
+        self.ff = StringIO(text)
+        self.most = most
+
+    def read(self, size):
+        return self.ff.read(min(size, self.most or size))
+
+class ExportTest(unittest.TestCase):
+
+    def test_values_split_across_reads(self):
+        text = json.dumps([u'a long word', 12345, {u'k': u'先'}, u'生生'])
+        for size in (1, 2, 3, 7):
+            scanner = JSONScanner(StringIO(text), size)
+            scanner.expect('[')
+            values = [scanner.value()]
+            while scanner.expect(',]') == ',':
+                values.append(scanner.value())
+            self.assertEqual(values, json.loads(text))
+            self.assertEqual(scanner.peek(), '')
+
+    def test_iter_json(self):
+        for most in (1, 5, None):
+            ff = Unseekable(json.dumps(DATA, ensure_ascii=False).encode('utf-8'), most)
+            words = dict((key, list(words)) for key, words in iter_json(ff))
+            self.assertEqual(words, DATA)
+
+    def test_truncated_json(self):
+        self.assertRaises(ValueError, lambda: list(iter_json(StringIO('{"people": ["chef"'))))
+
+    def test_sorted_json(self):
+        for ff in (StringIO(json.dumps(DATA)), Unseekable(json.dumps(DATA))):
+            words = dict((key, list(words)) for key, words in sorted_json(ff))
+            self.assertEqual(words, dict((key, sorted(val)) for key, val in DATA.items()))
+
+    def test_csv_quoting(self):
+        lines = list(csv_lines([(u'items', iter([u'cup, "big"']))]))
+        self.assertEqual(lines, [u'category,word\n', u'items,"cup, ""big"""\n'])
+
+if __name__ == '__main__':
+    unittest.main()
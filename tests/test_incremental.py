@@ -0,0 +1,48 @@
+"""Bookkeeping for compiler --update."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+from chargenlib.incremental import load_state, merge_classes, save_state
+from chargenlib.util import write_atomic
+
+class IncrementalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_state_round_trip(self):
+        fname = os.path.join(self.tmp, 'words.json')
+        self.assertEqual(load_state(fname), (set(), Counter()))
+        save_state(fname, set(['abc']), Counter({('chef', 'NN'): 2}))
+        self.assertEqual(load_state(fname), (set(['abc']), Counter({('chef', 'NN'): 2})))
+
+    def test_write_atomic_leaves_no_temporary_files(self):
+        fname = os.path.join(self.tmp, 'words.json')
+        for text in ('old', 'new'):
+            with write_atomic(fname) as ff:
+                ff.write(text)
+        with open(fname) as ff:
+            self.assertEqual(ff.read(), 'new')
+        self.assertEqual(os.listdir(self.tmp), ['words.json'])
+
+    def test_write_atomic_cleans_up_on_error(self):
+        fname = os.path.join(self.tmp, 'words.json')
+        def fail():
+            with write_atomic(fname) as ff:
+                ff.write('half')
+                raise IOError('disk full')
+        self.assertRaises(IOError, fail)
+        self.assertEqual(os.listdir(self.tmp), [])
+
+    def test_merge_classes(self):
+        merged = merge_classes({'people': ['chef']}, {'people': ['baker', 'chef'], 'items': ['cup']})
+        self.assertEqual(merged, {'people': ['baker', 'chef'], 'items': ['cup']})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""The in-process compile and render API."""
+
+import unittest
+from chargenlib.pipeline import Renderer
+
+WORDS = {'adjectives': ['red', 'old'], 'people': ['chef', 'baker']}
+COUNTS = {'red': 5, 'old': 1, 'chef': 2, 'baker': 3}
+
+class RendererTest(unittest.TestCase):
+
+    def test_seeded_lines_repeat(self):
+        renderer = Renderer(WORDS)
+        first = list(renderer.render_lines('The %jj :person', 5, seed=3))
+        self.assertEqual(first, list(renderer.render_lines('The %jj :person', 5, seed=3)))
+
+    def test_unknown_category(self):
+        self.assertRaises(ValueError, Renderer(WORDS).compile, ':nope')
+
+    def test_too_many_unique_slots(self):
+        renderer = Renderer(WORDS)
+        renderer.compile('%person %person')
+        renderer.compile('%person :person')
+        self.assertRaises(ValueError, renderer.compile, '%person %person :person')
+        self.assertRaises(ValueError, Renderer({'people': []}).compile, ':person')
+
+    def test_template_cache_is_bounded(self):
+        renderer = Renderer(WORDS, cache_size=2)
+        for template in [':person', 'The :person', ':jj', ':person']:
+            renderer.compile(template)
+        self.assertEqual(list(renderer.templates), [':jj', ':person'])
+
+    def test_unknown_weighting(self):
+        self.assertRaises(ValueError, Renderer, WORDS, counts=COUNTS, weighting='bogus')
+
+    def test_temperature_must_be_positive(self):
+        for temperature in (0, 0.0, -1.0):
+            self.assertRaises(ValueError, Renderer, WORDS, counts=COUNTS, temperature=temperature)
+
+    def test_zero_counts(self):
+        for weighting in ('frequency', 'inverse'):
+            renderer = Renderer(WORDS, counts={'chef': 0, 'baker': 0, 'red': 0}, weighting=weighting)
+            lines = set(line.strip() for line in renderer.render_lines(':person', 20, seed=1))
+            self.assertEqual(lines, set(['chef', 'baker']))
+
+if __name__ == '__main__':
+    unittest.main()
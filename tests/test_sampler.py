@@ -0,0 +1,52 @@
+"""Draws with and without replacement."""
+
+import random
+import unittest
+from chargenlib.sampler import Sampler, WeightedSampler
+
+WORDS = {'people': ['chef', 'baker', 'smith', 'miller', 'cook']}
+
+class SamplerTest(unittest.TestCase):
+
+    def test_unique_draws_use_every_word_once(self):
+        sampler = Sampler(WORDS, random.Random(1).random)
+        for xx in range(20):
+            sampler.reset()
+            drawn = [sampler.draw('people', True) for word in WORDS['people']]
+            self.assertEqual(sorted(drawn), sorted(WORDS['people']))
+            self.assertRaises(IndexError, sampler.draw, 'people')
+
+    def test_unique_draws_are_uniform(self):
+        sampler = Sampler(WORDS, random.Random(2).random)
+        counts = dict((word, 0) for word in WORDS['people'])
+        for xx in range(5000):
+            sampler.reset()
+            sampler.draw('people', True)
+            counts[sampler.draw('people', True)] += 1
+        for count in counts.values():
+            self.assertTrue(850 < count < 1150, counts)
+
+    def test_draws_skip_unique_words(self):
+        sampler = Sampler(WORDS, random.Random(3).random)
+        for xx in range(200):
+            sampler.reset()
+            word = sampler.draw('people', True)
+            self.assertNotEqual(sampler.draw('people'), word)
+
+    def test_categories_are_not_changed(self):
+        words = {'people': list(WORDS['people'])}
+        sampler = Sampler(words, random.Random(4).random)
+        for xx in range(4):
+            sampler.draw('people', True)
+        self.assertEqual(words, WORDS)
+
+    def test_weighted_draws_skip_unique_words(self):
+        weights = lambda words: [100.0] + [1.0] * (len(words) - 1)
+        sampler = WeightedSampler(WORDS, weights, random.Random(5).random)
+        for xx in range(50):
+            sampler.reset()
+            drawn = [sampler.draw('people', True) for word in WORDS['people']]
+            self.assertEqual(sorted(drawn), sorted(WORDS['people']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+"""Seeded, sharded line streams."""
+
+import unittest
+from chargenlib.streams import blocks, parse_shard
+
+class BlocksTest(unittest.TestCase):
+
+    def test_shards_cover_every_block_once(self):
+        whole = list(blocks(1000, 7, size=64))
+        self.assertEqual(sum(lines for lines, seed in whole), 1000)
+        for shards in (1, 2, 3, 16, 20):
+            parts = []
+            for shard in range(shards):
+                parts += list(blocks(1000, 7, shard, shards, size=64))
+            self.assertEqual(parts, whole)
+
+    def test_seeds_depend_on_seed(self):
+        self.assertNotEqual(list(blocks(200, 1, size=64)), list(blocks(200, 2, size=64)))
+        self.assertEqual([seed for lines, seed in blocks(200, size=64)], [None] * 4)
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard('2/3'), (1, 3))
+        for text in ('0/3', '4/3', 'x/3'):
+            self.assertRaises(ValueError, parse_shard, text)
+
+if __name__ == '__main__':
+    unittest.main()
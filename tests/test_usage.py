@@ -0,0 +1,48 @@
+"""Check that every script's usage text parses with docopt."""
+
+import ast
+import os
+import unittest
+from docopt import docopt
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def usage(script):
+    """Read a script's docstring without running its imports."""
+    with open(os.path.join(ROOT, script)) as ff:
+        return ast.get_docstring(ast.parse(ff.read()))
+
+class UsageTest(unittest.TestCase):
+
+    def parse(self, script, argv):
+        return docopt(usage(script), argv=argv)
+
+    def test_compiler(self):
+        self.assertEqual(self.parse('chargen-compiler.py', [])['--jobs'], '1')
+        args = self.parse('chargen-compiler.py', ['--jobs=2', 'a.txt'])
+        self.assertEqual(args['<file>'], ['a.txt'])
+        args = self.parse('chargen-compiler.py', ['--batch', '-j', '4', 'a.txt', 'b.txt'])
+        self.assertTrue(args['--batch'])
+
+    def test_renderer(self):
+        args = self.parse('char-renderer.py', ['words.json', ':person', '-w', 'counts.json', '-t', '0.5'])
+        self.assertEqual(args['--weights'], 'counts.json')
+        self.assertEqual(args['--temperature'], '0.5')
+        self.assertEqual(args['--weighting'], 'frequency')
+        args = self.parse('char-renderer.py', ['words.json', ':person', '-b', '-j'])
+        self.assertTrue(args['--batch'])
+        self.assertTrue(args['--japanese'])
+
+    def test_server(self):
+        args = self.parse('chargen-server.py', ['words.json', '-w', 'counts.json', '--weighting=inverse'])
+        self.assertEqual(args['--weights'], 'counts.json')
+        self.assertEqual(args['--weighting'], 'inverse')
+        self.assertEqual(args['--temperature'], '1.0')
+
+    def test_bench(self):
+        args = self.parse('bench/bench.py', ['--baseline=bench/baseline.json'])
+        self.assertEqual(args['--baseline'], 'bench/baseline.json')
+        self.assertEqual(args['--tolerance'], '1.25')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""Loading and merging word list files."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from chargenlib.binary import write_binary
+from chargenlib.wordlists import load_wordlists
+
+class LoadWordListsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write_json(self, name, data):
+        fname = os.path.join(self.tmp, name)
+        with open(fname, 'w') as ff:
+            json.dump(data, ff)
+        return fname
+
+    def test_single_json_file_is_deduplicated(self):
+        fname = self.write_json('a.json', {'people': ['chef', 'chef', 'baker']})
+        words = load_wordlists([fname])
+        self.assertEqual(sorted(words['people']), ['baker', 'chef'])
+
+    def test_merge_json(self):
+        aa = self.write_json('a.json', {'people': ['chef'], 'items': ['cup']})
+        bb = self.write_json('b.json', {'people': ['chef', 'baker']})
+        words = load_wordlists([aa, bb])
+        self.assertEqual(sorted(words['people']), ['baker', 'chef'])
+        self.assertEqual(words['items'], ['cup'])
+
+    def test_merge_binary(self):
+        aa = os.path.join(self.tmp, 'a.chgn')
+        bb = os.path.join(self.tmp, 'b.chgn')
+        write_binary({'people': ['chef']}, aa)
+        write_binary({'people': ['chef', 'baker']}, bb)
+        self.assertEqual(list(load_wordlists([aa])['people']), ['chef'])
+        self.assertEqual(list(load_wordlists([aa, bb])['people']), ['baker', 'chef'])
+
+    def test_merge_binary_non_ascii(self):
+        aa = os.path.join(self.tmp, 'a.chgn')
+        bb = os.path.join(self.tmp, 'b.chgn')
+        write_binary({'people': [u'\u5148\u751f', u'chef'], 'items': [u'cup']}, aa)
+        write_binary({'people': [u'\u00e9l\u00e8ve', u'chef']}, bb)
+        words = load_wordlists([aa, bb])
+        self.assertEqual(list(words['people']), [u'chef', u'\u00e9l\u00e8ve', u'\u5148\u751f'])
+        self.assertEqual(words['people'][1], u'\u00e9l\u00e8ve')
+        self.assertEqual(len(words['items']), 1)
+
+if __name__ == '__main__':
+    unittest.main()